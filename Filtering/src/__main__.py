@@ -2,12 +2,15 @@
 from __future__ import annotations
 
 import argparse
+import time
 from pathlib import Path
 
 import open3d as o3d
+import yaml
 
+from cache import ResultCache
 from pipeline import PointCloudPipeline
-from rs_capture import capture_pointcloud
+from profiling import Profiler
 
 
 def parse_args():
@@ -15,12 +18,46 @@ def parse_args():
     src = ap.add_mutually_exclusive_group(required=True)
     src.add_argument('--input', '-i', type=str, help='Path to .ply/.pcd/.xyz/.bag file')
     src.add_argument('--device', type=int, help='RealSense device index (numeric)')
+    src.add_argument('--batch', type=str, help='Directory or glob of recordings to filter in parallel')
 
     ap.add_argument('--frames', type=int, default=30, help='Frames to skip before snapshot')
+    ap.add_argument('--stream', action='store_true', help='Keep the camera running and filter frames continuously')
+    ap.add_argument('--organized', action='store_true', help='Filter live frames on the depth image (fast path)')
     ap.add_argument('--config', type=str, default=Path(__file__).with_name('params.yaml'))
     ap.add_argument('--out', '-o', type=str, help='Output filename (.ply). If omitted, just visualizes.')
+    ap.add_argument('--out-dir', type=str, help='Output directory for --batch')
+    ap.add_argument('--workers', '-j', type=int, help='Worker processes for --batch (default: all cores)')
+    ap.add_argument('--force', action='store_true', help='Re-filter --batch files even if outputs are up to date')
+    ap.add_argument('--cache', type=str, help='Directory of cached stage results (reused across runs)')
+    ap.add_argument('--cache-size', type=float, default=2048, help='Cache size limit in MB (LRU eviction)')
+    ap.add_argument('--cache-float32', action='store_true',
+                    help='Store cached clouds as float32 (half the size; resumed runs are no longer exact)')
+    ap.add_argument('--segment', action='store_true',
+                    help='Keep every cluster (one output per object with --out) instead of the largest')
     ap.add_argument('--visualize', action='store_true', help='Show Open3D viewer before/after')
-    return ap.parse_args()
+    ap.add_argument('--profile', action='store_true', help='Print per‑stage timings and point counts')
+    ap.add_argument('--profile-json', type=str, help='Also dump the per‑stage statistics to this JSON file')
+    ap.add_argument('--profile-memory', action='store_true', help='Track peak NumPy memory per stage (slower)')
+    args, extra = ap.parse_known_args()
+    args.overrides = parse_overrides(ap, extra)
+    args.cache_dtype = 'float32' if args.cache_float32 else 'float64'
+    return args
+
+
+def parse_overrides(ap: argparse.ArgumentParser, extra: list) -> dict:
+    """Turn ``--section.key value`` pairs into ``{'section.key': value}`` (YAML‑typed)."""
+    overrides = {}
+    it = iter(extra)
+    for flag in it:
+        if not flag.startswith('--') or '.' not in flag:
+            ap.error(f'unrecognized argument: {flag}')
+        key, _, value = flag[2:].partition('=')
+        if not _:
+            value = next(it, None)
+            if value is None:
+                ap.error(f'{flag} expects a value')
+        overrides[key] = yaml.safe_load(value)
+    return overrides
 
 
 def load_pointcloud(path: Path) -> o3d.geometry.PointCloud:
@@ -29,20 +66,116 @@ def load_pointcloud(path: Path) -> o3d.geometry.PointCloud:
     return o3d.io.read_point_cloud(str(path))
 
 
+def run_stream(pipeline: PointCloudPipeline, args) -> None:
+    """Filter live frames until Ctrl‑C, optionally in a non‑blocking viewer."""
+    from rs_capture import stream_pointclouds
+    vis, shown = None, o3d.geometry.PointCloud()
+    if args.visualize:
+        vis = o3d.visualization.Visualizer()
+        vis.create_window(window_name='Filtered (live)')
+    t0, n = time.perf_counter(), 0
+    try:
+        for pc in stream_pointclouds(pipeline, device_index=args.device, frames=args.frames,
+                                     organized=args.organized):
+            n += 1
+            if vis is not None:
+                shown.points, shown.colors, shown.normals = pc.points, pc.colors, pc.normals
+                if n == 1:
+                    vis.add_geometry(shown)
+                vis.update_geometry(shown)
+                if not vis.poll_events():
+                    break
+                vis.update_renderer()
+            print(f'\rframe {n:5d}  {len(pc.points):7d} pts  {n / (time.perf_counter() - t0):5.1f} Hz', end='')
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print()
+        if vis is not None:
+            vis.destroy_window()
+    if args.out and n:
+        o3d.io.write_point_cloud(args.out, pc)
+        print(f'Saved last filtered cloud to {args.out}')
+
+
+def run_segment(pipeline: PointCloudPipeline, args) -> None:
+    """Print every object of the scene and save each one next to ``--out``."""
+    seg = pipeline.segment(load_pointcloud(Path(args.input)))
+    print(seg.summary())
+    if args.visualize and len(seg):
+        o3d.visualization.draw_geometries([seg.cloud(i).paint_uniform_color(_PALETTE[i % len(_PALETTE)])
+                                           for i in range(len(seg))],
+                                          window_name='Segmented objects')
+    if args.out:
+        out = Path(args.out)
+        for i in range(len(seg)):
+            dst = out.with_name(f'{out.stem}_obj{i}{out.suffix or ".ply"}')
+            o3d.io.write_point_cloud(str(dst), seg.cloud(i))
+        print(f'Saved {len(seg)} object(s) as {out.stem}_obj*.ply')
+
+
+_PALETTE = [(0.9, 0.2, 0.2), (0.2, 0.7, 0.2), (0.2, 0.4, 0.9), (0.9, 0.7, 0.1),
+            (0.7, 0.2, 0.8), (0.1, 0.8, 0.8), (0.5, 0.5, 0.5), (0.9, 0.5, 0.2)]
+
+
 def main():
     args = parse_args()
-    pipeline = PointCloudPipeline.from_yaml(args.config)
+    if args.batch:
+        if not args.out_dir:
+            raise SystemExit('--batch requires --out-dir')
+        from batch import run_batch
+        results = run_batch(args.batch, args.out_dir, args.config, args.overrides,
+                            workers=args.workers, force=args.force,
+                            cache_dir=args.cache, cache_bytes=int(args.cache_size * 2**20),
+                            cache_dtype=args.cache_dtype)
+        raise SystemExit(1 if any(r.error for r in results) else 0)
+
+    pipeline = PointCloudPipeline.from_yaml(args.config, args.overrides)
+    if args.profile or args.profile_json or args.profile_memory:
+        pipeline.profiler = Profiler(memory=args.profile_memory)
+    if args.cache:
+        pipeline.cache = ResultCache(args.cache, int(args.cache_size * 2**20), args.cache_dtype)
+
+    if args.stream:
+        if args.device is None:
+            raise SystemExit('--stream requires --device')
+        run_stream(pipeline, args)
+        report_profile(pipeline, args)
+        return
+
+    if args.segment:
+        if not args.input:
+            raise SystemExit('--segment requires --input')
+        run_segment(pipeline, args)
+        report_profile(pipeline, args)
+        return
 
     if args.input:
-        pc = load_pointcloud(Path(args.input))
+        filtered = pipeline(load_pointcloud(Path(args.input)), visualize=args.visualize)
+    elif args.organized:
+        from rs_capture import CaptureSession
+        with CaptureSession(device_index=args.device, warmup=args.frames) as cam:
+            depth, colors, intrinsics, scale = cam.read_depth()
+        filtered = pipeline.process_depth(depth, intrinsics, scale, colors, visualize=args.visualize)
     else:
+        from rs_capture import capture_pointcloud
         pc = capture_pointcloud(device_index=args.device, frames=args.frames)
+        filtered = pipeline(pc, visualize=args.visualize)
 
-    filtered = pipeline(pc, visualize=args.visualize)
+    report_profile(pipeline, args)
 
     if args.out:
         o3d.io.write_point_cloud(args.out, filtered)
         print(f'Saved filtered cloud to {args.out}')
 
+
+def report_profile(pipeline: PointCloudPipeline, args) -> None:
+    if pipeline.profiler is None:
+        return
+    print(pipeline.profiler.table())
+    if args.profile_json:
+        pipeline.profiler.to_json(args.profile_json)
+        print(f'Saved profile to {args.profile_json}')
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,153 @@
+"""Batch filtering of recorded clouds over a process pool.
+
+Each worker builds the pipeline once (YAML parse, stage compilation) and
+then filters many files, so the per‑file cost is only I/O + filtering.
+Outputs that are newer than both their input and the config are skipped.
+"""
+from __future__ import annotations
+
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import open3d as o3d
+
+from cache import ResultCache
+from pipeline import PointCloudPipeline
+
+CLOUD_SUFFIXES = ('.ply', '.pcd', '.xyz', '.xyzn', '.xyzrgb', '.pts')
+
+_PIPELINE: Optional[PointCloudPipeline] = None   # one per worker process
+
+
+class FileResult(NamedTuple):
+    src: str
+    dst: str
+    n_in: int
+    n_out: int
+    seconds: float
+    error: Optional[str] = None
+
+
+def find_inputs(pattern: Union[str, Path]) -> Tuple[List[Path], Optional[Path]]:
+    """Return ``(files, root)`` for a directory (searched recursively) or a glob.
+
+    *root* is the directory outputs are made relative to (``None`` for globs).
+    """
+    path = Path(pattern)
+    if path.is_dir():
+        files = [p for p in sorted(path.rglob('*')) if p.suffix.lower() in CLOUD_SUFFIXES]
+        return files, path
+    files = [Path(p) for p in sorted(glob.glob(str(pattern), recursive=True))]
+    return [p for p in files if p.suffix.lower() in CLOUD_SUFFIXES], None
+
+
+def output_path(src: Path, out_dir: Path, root: Optional[Path]) -> Path:
+    rel = src.relative_to(root) if root is not None else Path(src.name)
+    return (out_dir / rel).with_suffix('.ply')
+
+
+def is_up_to_date(src: Path, dst: Path, config: Path) -> bool:
+    if not dst.exists():
+        return False
+    return dst.stat().st_mtime >= max(src.stat().st_mtime, config.stat().st_mtime)
+
+# ---------- worker side ----------------------------------------
+
+def _init_worker(config: str,
+                 overrides: Optional[dict],
+                 cache_dir: Optional[str] = None,
+                 cache_bytes: int = 2 << 30,
+                 cache_dtype: str = 'float64') -> None:
+    global _PIPELINE
+    _PIPELINE = PointCloudPipeline.from_yaml(config, overrides)
+    if cache_dir:
+        _PIPELINE.cache = ResultCache(cache_dir, cache_bytes, cache_dtype)
+
+
+def _filter_file(src: str, dst: str) -> FileResult:
+    t0 = time.perf_counter()
+    try:
+        pc = o3d.io.read_point_cloud(src)
+        n_in = len(pc.points)
+        out = _PIPELINE(pc)
+        Path(dst).parent.mkdir(parents=True, exist_ok=True)
+        tmp = f'{dst}.tmp{os.getpid()}.ply'      # never leave a half‑written "up to date" output
+        if not o3d.io.write_point_cloud(tmp, out):
+            raise IOError(f'could not write {dst}')
+        os.replace(tmp, dst)
+        return FileResult(src, dst, n_in, len(out.points), time.perf_counter() - t0)
+    except Exception as exc:  # reported per file, the batch goes on
+        return FileResult(src, dst, 0, 0, time.perf_counter() - t0, f'{type(exc).__name__}: {exc}')
+
+# ---------- driver --------------------------------------------
+
+def run_batch(pattern: Union[str, Path],
+              out_dir: Union[str, Path],
+              config: Union[str, Path],
+              overrides: Optional[dict] = None,
+              workers: Optional[int] = None,
+              force: bool = False,
+              verbose: bool = True,
+              cache_dir: Optional[Union[str, Path]] = None,
+              cache_bytes: int = 2 << 30,
+              cache_dtype: str = 'float64') -> List[FileResult]:
+    """Filter every cloud matched by *pattern* into *out_dir* and report throughput.
+
+    With *cache_dir*, every worker shares a :class:`~cache.ResultCache` so
+    that a parameter change only recomputes the stages it affects.
+    """
+    files, root = find_inputs(pattern)
+    out_dir, config = Path(out_dir), Path(config)
+    jobs = []
+    for src in files:
+        dst = output_path(src, out_dir, root)
+        # CLI overrides are not reflected in the config mtime: always recompute
+        if force or overrides or not is_up_to_date(src, dst, config):
+            jobs.append((str(src), str(dst)))
+    skipped = len(files) - len(jobs)
+    if verbose:
+        print(f'{len(files)} clouds found, {skipped} up to date, {len(jobs)} to filter')
+    if not jobs:
+        return []
+
+    workers = workers or os.cpu_count() or 1
+    t0 = time.perf_counter()
+    results: List[FileResult] = []
+    if workers == 1:
+        _init_worker(str(config), overrides, cache_dir and str(cache_dir), cache_bytes, cache_dtype)
+        results = [_report(_filter_file(*job), verbose) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)),
+                                 initializer=_init_worker,
+                                 initargs=(str(config), overrides,
+                                           cache_dir and str(cache_dir), cache_bytes,
+                                           cache_dtype)) as pool:
+            futures = [pool.submit(_filter_file, *job) for job in jobs]
+            for fut in as_completed(futures):
+                results.append(_report(fut.result(), verbose))
+    elapsed = time.perf_counter() - t0
+
+    if verbose:
+        print(summarize(results, elapsed))
+    return results
+
+
+def _report(res: FileResult, verbose: bool) -> FileResult:
+    if verbose:
+        if res.error:
+            print(f'  FAILED {res.src}: {res.error}')
+        else:
+            print(f'  {res.src} -> {res.dst}  {res.n_in} -> {res.n_out} pts  {res.seconds:.2f} s')
+    return res
+
+
+def summarize(results: Iterable[FileResult], elapsed: float) -> str:
+    results = list(results)
+    ok = [r for r in results if r.error is None]
+    points = sum(r.n_in for r in ok)
+    return (f'{len(ok)}/{len(results)} clouds in {elapsed:.2f} s: '
+            f'{len(ok) / elapsed:.2f} clouds/s, {points / elapsed / 1e6:.2f} Mpoints/s')
@@ -0,0 +1,278 @@
+"""Reproducible benchmark of the filtering stages on synthetic table‑top scenes.
+
+Runs headless on CPU, no camera needed:
+
+    python bench.py --sizes 10000 100000 1000000 --out bench.json
+    python bench.py --compare bench.json          # after a change
+    python bench.py --sizes 100000 --backends      # legacy vs tensor agreement
+    python bench.py --config params_throughput.yaml
+
+Configs that crop (the presets) get the scene in the camera frame, inside
+their crop box; the others keep the table frame (see :func:`scene_height`).
+
+Every filter function is timed in isolation on the raw scene, then the full
+``PointCloudPipeline``. Output point counts are recorded as well so that a
+"speed‑up" that silently changes the result is flagged by ``--compare``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import open3d as o3d
+import yaml
+
+import filters as fl
+from pipeline import DEFAULT_ORDER, PointCloudPipeline
+
+# ---------- synthetic scenes ----------------------------------
+
+def make_scene(n_points: int = 100_000,
+               n_objects: int = 2,
+               noise: float = 0.002,
+               outlier_ratio: float = 0.01,
+               nan_ratio: float = 0.001,
+               seed: int = 0,
+               camera_height: Optional[float] = None) -> o3d.geometry.PointCloud:
+    """Table plane (z = 0, 1 m × 1 m) with spheres / cylinders / boxes on top.
+
+    Half of the points go to the table, the rest is split between the
+    objects; Gaussian *noise* (m) is added to all surface points, then
+    uniform outliers and NaN points are mixed in. With *camera_height* the
+    scene is returned in the frame of a camera looking straight down from
+    that height (+z forward): the table lies at z = *camera_height* and the
+    objects rise towards the camera.
+    """
+    rng = np.random.default_rng(seed)
+    n_out = int(n_points * outlier_ratio)
+    n_nan = int(n_points * nan_ratio)
+    n_surf = n_points - n_out - n_nan
+    n_table = n_surf // 2 if n_objects else n_surf
+    parts = [np.c_[rng.uniform(-0.5, 0.5, (n_table, 2)), np.zeros(n_table)]]
+
+    kinds = ('sphere', 'cylinder', 'box')
+    per_obj = np.full(n_objects, (n_surf - n_table) // max(n_objects, 1))
+    per_obj[:(n_surf - n_table) - per_obj.sum()] += 1
+    for i, m in enumerate(per_obj):
+        size = rng.uniform(0.04, 0.08)
+        base = np.r_[rng.uniform(-0.3, 0.3, 2), 0.0]
+        kind = kinds[i % len(kinds)]
+        if kind == 'sphere':
+            d = rng.normal(size=(m, 3))
+            p = d / np.linalg.norm(d, axis=1, keepdims=True) * size + [0, 0, size]
+        elif kind == 'cylinder':
+            a = rng.uniform(0, 2 * np.pi, m)
+            p = np.c_[size * np.cos(a), size * np.sin(a), rng.uniform(0, 3 * size, m)]
+        else:
+            p = rng.uniform(-1, 1, (m, 3))
+            face = rng.integers(0, 3, m)
+            p[np.arange(m), face] = np.sign(p[np.arange(m), face])
+            p = p * [size, 1.5 * size, size] + [0, 0, size]
+        parts.append(p + base)
+
+    surf = np.concatenate(parts) + rng.normal(0, noise, (n_surf, 3))
+    outliers = rng.uniform([-0.5, -0.5, -0.05], [0.5, 0.5, 0.4], (n_out, 3))
+    nans = np.full((n_nan, 3), np.nan)
+    xyz = np.concatenate([surf, outliers, nans])
+    xyz = xyz[rng.permutation(len(xyz))]
+    if camera_height is not None:   # half turn about x: (x, y, z) -> (x, -y, h - z)
+        xyz[:, 1:] *= -1
+        xyz[:, 2] += camera_height
+    return o3d.geometry.PointCloud(o3d.utility.Vector3dVector(xyz))
+
+
+CAMERA_HEIGHT = 0.8   # m: table and objects (0.4-0.8 m away) inside the presets' 0.2-1.2 m crop
+
+
+def scene_height(params: dict) -> Optional[float]:
+    """Camera height for :func:`make_scene` under *params*: :data:`CAMERA_HEIGHT` when the
+    pipeline crops (the crop bounds are in the camera frame), ``None`` (table frame) otherwise."""
+    crop = params.get('crop') or {}
+    crops = 'crop' in params.get('pipeline', DEFAULT_ORDER) and crop.get('enabled', True)
+    return CAMERA_HEIGHT if crops else None
+
+# ---------- timing --------------------------------------------
+
+def _time(fn: Callable[[o3d.geometry.PointCloud], o3d.geometry.PointCloud],
+          pc: o3d.geometry.PointCloud,
+          repeat: int) -> dict:
+    times, n_out = [], 0
+    for _ in range(repeat):
+        src = o3d.geometry.PointCloud(pc)   # stages may modify their input in place
+        t0 = time.perf_counter()
+        out = fn(src)
+        times.append(time.perf_counter() - t0)
+        n_out = len(out.points)
+    return {'ms_median': 1e3 * float(np.median(times)),
+            'ms_min': 1e3 * float(np.min(times)),
+            'n_in': len(pc.points),
+            'n_out': n_out}
+
+
+def stage_functions(params: dict) -> Dict[str, Callable]:
+    """Each filter with its ``params.yaml`` arguments (plane seeded for repeatability).
+
+    ``crop`` uses the config's box when the pipeline crops, else a box that
+    keeps the objects and drops the table of the table‑frame scene.
+    """
+    plane = dict(params['plane'], seed=0)
+    crop = params.get('crop') or {}
+    if scene_height(params) is not None:
+        box = (crop['min_bound'], crop['max_bound'])
+    else:
+        box = ((-0.4, -0.4, 0.005), (0.4, 0.4, 0.3))
+    return {
+        'invalid': fl.remove_invalid_points,
+        'sor': lambda pc: fl.statistical_outlier_removal(pc, **params['sor']),
+        'ror': lambda pc: fl.radius_outlier_removal(pc, **params['ror']),
+        'voxel': lambda pc: fl.voxel_downsample(pc, **params['voxel']),
+        'plane': lambda pc: fl.remove_planes_ransac(pc, **plane),
+        'crop': lambda pc: fl.crop_bounding_box(pc, *box),
+        'cluster': lambda pc: fl.select_largest_cluster(pc, **{k: v for k, v in params['cluster'].items()
+                                                                 if k != 'enabled'}),
+        'normals': lambda pc: fl.estimate_normals(pc, **params['normals']),
+        'normalize': lambda pc: fl.center_and_scale(pc)[0],
+    }
+
+
+def run(sizes: List[int],
+        config: Path,
+        repeat: int = 3,
+        stages: Optional[List[str]] = None,
+        seed: int = 0,
+        verbose: bool = True) -> dict:
+    with open(config) as f:
+        params = yaml.safe_load(f)
+    params.setdefault('plane', {})['seed'] = 0
+    funcs = stage_functions(params)
+    pipe = PointCloudPipeline(params)
+    height = scene_height(params)
+    results = []
+    for n in sizes:
+        scene = make_scene(n, seed=seed, camera_height=height)
+        clean = fl.remove_invalid_points(o3d.geometry.PointCloud(scene))  # NaN‑free input for the others
+        for name, fn in funcs.items():
+            if stages and name not in stages:
+                continue
+            r = dict(size=n, stage=name, **_time(fn, scene if name == 'invalid' else clean, repeat))
+            results.append(r)
+            if verbose:
+                print(f'{n:>9} {name:<10} {r["ms_median"]:9.2f} ms  {r["n_in"]:>8} -> {r["n_out"]}')
+        if not stages or 'pipeline' in stages:
+            r = dict(size=n, stage='pipeline', **_time(pipe, scene, repeat))
+            results.append(r)
+            if verbose:
+                print(f'{n:>9} {"pipeline":<10} {r["ms_median"]:9.2f} ms  {r["n_in"]:>8} -> {r["n_out"]}')
+    return {'meta': _meta(config, repeat, seed, height), 'results': results}
+
+
+def _meta(config: Path, repeat: int, seed: int, camera_height: Optional[float] = None) -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, cwd=Path(__file__).parent).stdout.strip()
+    except OSError:
+        commit = ''
+    return {'commit': commit, 'config': str(config), 'repeat': repeat, 'seed': seed,
+            'camera_height': camera_height,
+            'python': platform.python_version(), 'numpy': np.__version__,
+            'open3d': o3d.__version__, 'machine': platform.machine(), 'platform': platform.platform()}
+
+# ---------- backend agreement ---------------------------------
+
+def backend_agreement(sizes: List[int],
+                      config: Path,
+                      seed: int = 0,
+                      count_tol: float = 0.03,
+                      centroid_tol: float = 0.005,
+                      verbose: bool = True) -> List[dict]:
+    """Run the pipeline on both backends and check that their outputs agree.
+
+    ``normalize`` is left out so centroids are compared in metres. The
+    tensor backend works in float32 and Open3D's tensor SOR/ROR/voxel
+    kernels round distances and voxel keys differently, so a few border
+    points flip: on the synthetic scenes (10k–300k points) output counts
+    differ by up to ~2 % and centroids by up to ~3 mm. A size passes when the counts differ by at
+    most *count_tol* (relative) and the centroids by at most *centroid_tol* (m).
+    """
+    with open(config) as f:
+        params = yaml.safe_load(f)
+    params.setdefault('plane', {})['seed'] = 0
+    params['pipeline'] = [s for s in params.get('pipeline', DEFAULT_ORDER) if s != 'normalize']
+    height = scene_height(params)
+    rows = []
+    for n in sizes:
+        scene = make_scene(n, seed=seed, camera_height=height)
+        out = {}
+        for backend in ('legacy', 'tensor'):
+            pc = PointCloudPipeline(dict(params, backend=backend))(o3d.geometry.PointCloud(scene))
+            out[backend] = np.asarray(pc.points)
+        a, b = out['legacy'], out['tensor']
+        drift = abs(len(b) - len(a)) / max(len(a), 1)
+        dist = float(np.linalg.norm(a.mean(axis=0) - b.mean(axis=0))) if len(a) and len(b) else float('inf')
+        r = {'size': n, 'n_legacy': len(a), 'n_tensor': len(b), 'count_drift': drift,
+             'centroid_dist': dist, 'ok': drift <= count_tol and dist <= centroid_tol}
+        rows.append(r)
+        if verbose:
+            print(f'{n:>9} backends   {len(a):>8} vs {len(b):<8} ({drift:.2%}), centroid '
+                  f'{1e3 * dist:.3f} mm{"" if r["ok"] else "  MISMATCH"}')
+    return rows
+
+# ---------- comparison ----------------------------------------
+
+def compare(baseline: dict, current: dict, count_tol: float = 0.02) -> List[str]:
+    """Human‑readable diff; point counts off by more than *count_tol* are marked REGRESSION."""
+    base = {(r['size'], r['stage']): r for r in baseline['results']}
+    lines, bad = [], 0
+    for r in current['results']:
+        b = base.get((r['size'], r['stage']))
+        if b is None:
+            continue
+        speed = b['ms_median'] / r['ms_median'] if r['ms_median'] else float('inf')
+        drift = abs(r['n_out'] - b['n_out']) / max(b['n_out'], 1)
+        flag = ''
+        if drift > count_tol:
+            flag, bad = f'  REGRESSION: n_out {b["n_out"]} -> {r["n_out"]}', bad + 1
+        lines.append(f'{r["size"]:>9} {r["stage"]:<10} {b["ms_median"]:9.2f} -> {r["ms_median"]:9.2f} ms '
+                     f'(x{speed:.2f}){flag}')
+    lines.append(f'{bad} point-count regression(s)')
+    return lines
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Benchmark filtering stages on synthetic scenes')
+    ap.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    ap.add_argument('--config', type=str, default=Path(__file__).with_name('params.yaml'))
+    ap.add_argument('--repeat', type=int, default=3)
+    ap.add_argument('--stages', nargs='+', help='Subset of stages (and/or "pipeline") to time')
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--out', '-o', type=str, help='Write results as JSON')
+    ap.add_argument('--compare', type=str, help='Baseline JSON to compare against')
+    ap.add_argument('--backends', action='store_true',
+                    help='Also check that the legacy and tensor backends agree (exit 1 if not)')
+    args = ap.parse_args()
+
+    res = run(args.sizes, Path(args.config), args.repeat, args.stages, args.seed)
+    if args.backends:
+        res['backends'] = backend_agreement(args.sizes, Path(args.config), args.seed)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(res, f, indent=2)
+        print(f'Saved results to {args.out}')
+    if args.compare:
+        with open(args.compare) as f:
+            lines = compare(json.load(f), res)
+        print('\n'.join(lines))
+        if not lines[-1].startswith('0 '):
+            raise SystemExit(1)
+    if args.backends and not all(r['ok'] for r in res['backends']):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
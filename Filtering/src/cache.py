@@ -0,0 +1,143 @@
+"""Content‑addressed on‑disk cache of intermediate pipeline results.
+
+The key of a stage output is a hash chain: the input cloud's bytes, then
+the normalised parameters of every stage up to that one. Changing only the
+last stage therefore still hits the cached output of all earlier stages,
+and the pipeline resumes from the longest cached prefix.
+
+Entries use a small binary layout (header + raw arrays) and the directory
+is kept under *max_bytes* by evicting the least recently used files.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import struct
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+
+import numpy as np
+import open3d as o3d
+
+_MAGIC = b'PCC1'
+_HEADER = struct.Struct('<4sBBQ')   # magic, dtype code, attribute flags, number of points
+_DTYPES = {1: np.float32, 2: np.float64}
+_CODES = {np.dtype(t): c for c, t in _DTYPES.items()}
+_ATTRS = ('points', 'colors', 'normals')
+
+log = logging.getLogger(__name__)
+
+
+def hash_cloud(pc: o3d.geometry.PointCloud) -> str:
+    """Hash of the cloud content (points and, if present, colours and normals)."""
+    h = hashlib.blake2b(digest_size=16)
+    for attr in _ATTRS:
+        arr = np.asarray(getattr(pc, attr))
+        h.update(attr.encode())
+        h.update(np.ascontiguousarray(arr).tobytes())
+    return h.hexdigest()
+
+
+def chain_keys(input_key: str, specs: Iterable[object]) -> List[str]:
+    """Key of every stage prefix: ``key[i]`` identifies the output of ``specs[:i + 1]``."""
+    keys, key = [], input_key
+    for spec in specs:
+        blob = json.dumps(spec, sort_keys=True, default=repr).encode()
+        key = hashlib.blake2b(key.encode() + blob, digest_size=16).hexdigest()
+        keys.append(key)
+    return keys
+
+
+class ResultCache:
+    """Size‑bounded LRU directory of cached point clouds.
+
+    Arrays are stored as *dtype*. The float64 default is lossless, so a run
+    resumed from the cache gives the same output as a fresh one; float32
+    halves the entries but rounds the intermediate clouds (the pipeline adds
+    :attr:`dtype` to its keys so both kinds never mix).
+    """
+    def __init__(self, root: Union[str, Path], max_bytes: int = 2 << 30,
+                 dtype: Union[str, type] = np.float64):
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in _CODES:
+            raise ValueError(f'dtype must be float32 or float64, got {dtype}')
+        self.code = _CODES[self.dtype]
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = self.misses = 0
+        self._size = sum(p.stat().st_size for p in self.root.glob('*.pcc'))
+
+    def _path(self, key: str) -> Path:
+        return self.root / f'{key}.pcc'
+
+    # -----------------------------------------------------
+    def get(self, key: str) -> Optional[o3d.geometry.PointCloud]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                magic, code, flags, n = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC or code not in _DTYPES:
+                    raise ValueError('not a cache entry')
+                data = np.fromfile(f, dtype=_DTYPES[code])
+            pc = o3d.geometry.PointCloud()
+            off = 0
+            for bit, attr in enumerate(_ATTRS):
+                if flags & (1 << bit):
+                    arr = data[off:off + 3 * n].reshape(n, 3)   # ValueError if truncated
+                    setattr(pc, attr, o3d.utility.Vector3dVector(arr.astype(np.float64)))
+                    off += 3 * n
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (ValueError, struct.error) as e:   # corrupt, truncated or foreign file: a miss
+            log.warning('discarding unreadable cache entry %s: %s', path, e)
+            try:
+                self._size -= path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pc
+
+    def put(self, key: str, pc: o3d.geometry.PointCloud) -> None:
+        arrays = [np.asarray(getattr(pc, attr)) for attr in _ATTRS]
+        flags = sum(1 << bit for bit, arr in enumerate(arrays) if len(arr))
+        n = len(arrays[0])
+        path = self._path(key)
+        tmp = path.with_suffix(f'.tmp{os.getpid()}')
+        with open(tmp, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, self.code, flags, n))
+            for arr in arrays:
+                if len(arr):
+                    np.ascontiguousarray(arr, dtype=_DTYPES[self.code]).tofile(f)
+        old = path.stat().st_size if path.exists() else 0
+        os.replace(tmp, path)   # atomic: concurrent readers never see partial files
+        self._size += path.stat().st_size - old
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> None:
+        """Delete least recently used entries until the cache fits in *max_bytes*."""
+        entries = []
+        for p in self.root.glob('*.pcc'):
+            try:
+                st = p.stat()
+            except FileNotFoundError:  # removed by another process
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort()
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, p in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+            self._size -= size
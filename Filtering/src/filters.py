@@ -3,27 +3,45 @@ from __future__ import annotations
 
 import numpy as np
 import open3d as o3d
-from typing import Tuple, List
+from typing import Tuple, Optional
+
+import neighbors as nb
+from neighbors import NeighborIndex
 
 # ---------- general helpers ----------------------------------
 
-def _select_by_index(pc: o3d.geometry.PointCloud, indices: List[int]) -> o3d.geometry.PointCloud:
-    """Return point‑cloud made of *indices* (keeps attributes)."""
-    mask = np.zeros(len(pc.points), dtype=bool)
-    mask[indices] = True
-    return pc.select_by_index(np.where(mask)[0])
+def _select_by_mask(pc: o3d.geometry.PointCloud, mask: np.ndarray) -> o3d.geometry.PointCloud:
+    """Return point‑cloud made of the points where *mask* is True (keeps attributes)."""
+    return pc.select_by_index(np.flatnonzero(mask))
+
+
+def _keep(pc: o3d.geometry.PointCloud,
+          mask: np.ndarray,
+          index: Optional[NeighborIndex] = None) -> o3d.geometry.PointCloud:
+    """Select *mask* and compact the shared neighbour *index* to match (no‑op if nothing removed)."""
+    if mask.all():
+        return pc
+    if index is not None:
+        index.keep(mask)
+    return _select_by_mask(pc, mask)
 
 # ---------- step 0: invalid / NaN removal ---------------------
 
-def remove_invalid_points(pc: o3d.geometry.PointCloud) -> o3d.geometry.PointCloud:
-    pc.remove_non_finite_points()
+def remove_invalid_points(pc: o3d.geometry.PointCloud,
+                          index: Optional[NeighborIndex] = None) -> o3d.geometry.PointCloud:
+    if index is not None:
+        index.keep(np.isfinite(np.asarray(pc.points)).all(axis=1))
+    pc.remove_non_finite_points()   # in place: much cheaper than select_by_index
     return pc
 
 # ---------- step 1a: Statistical Outlier Removal -------------
 
 def statistical_outlier_removal(pc: o3d.geometry.PointCloud,
                                 nb_neighbors: int = 30,
-                                std_ratio: float = 1.5) -> o3d.geometry.PointCloud:
+                                std_ratio: float = 1.5,
+                                index: Optional[NeighborIndex] = None) -> o3d.geometry.PointCloud:
+    if index is not None:
+        return _keep(pc, nb.statistical_keep(index, nb_neighbors, std_ratio), index)
     pc, ind = pc.remove_statistical_outlier(nb_neighbors, std_ratio)
     return pc
 
@@ -31,7 +49,10 @@ def statistical_outlier_removal(pc: o3d.geometry.PointCloud,
 
 def radius_outlier_removal(pc: o3d.geometry.PointCloud,
                            nb_points: int = 3,
-                           radius: float = 0.02) -> o3d.geometry.PointCloud:
+                           radius: float = 0.02,
+                           index: Optional[NeighborIndex] = None) -> o3d.geometry.PointCloud:
+    if index is not None:
+        return _keep(pc, nb.radius_keep(index, nb_points, radius), index)
     pc, ind = pc.remove_radius_outlier(nb_points, radius)
     return pc
 
@@ -42,47 +63,176 @@ def voxel_downsample(pc: o3d.geometry.PointCloud, voxel_size: float = 0.005) ->
 
 # ---------- step 3: dominant plane removal (RANSAC) -----------
 
+def _sample_planes(xyz: np.ndarray,
+                   ransac_n: int,
+                   count: int,
+                   rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """Draw *count* minimal samples at once and fit one plane to each.
+
+    Returns unit normals ``(count, 3)`` and offsets ``(count,)`` so that
+    ``xyz @ normal + offset`` is the signed distance to the plane.
+    Degenerate (collinear) samples get a zero normal and never score.
+    """
+    n = xyz.shape[0]
+    idx = rng.integers(0, n, size=(count, ransac_n))
+    samples = xyz[idx]                                  # (count, ransac_n, 3)
+    centroid = samples.mean(axis=1)
+    if ransac_n == 3:
+        normals = np.cross(samples[:, 1] - samples[:, 0], samples[:, 2] - samples[:, 0])
+    else:
+        _, _, vt = np.linalg.svd(samples - centroid[:, None, :])
+        normals = vt[:, -1, :]
+    norm = np.linalg.norm(normals, axis=1)
+    valid = norm > 1e-12
+    normals[valid] /= norm[valid, None]
+    normals[~valid] = 0.0
+    offsets = -np.einsum('ij,ij->i', normals, centroid)
+    offsets[~valid] = np.inf
+    return normals, offsets
+
+
+def _segment_plane_mask(xyz: np.ndarray,
+                        distance_threshold: float,
+                        ransac_n: int,
+                        num_iterations: int,
+                        rng: np.random.Generator,
+                        probability: float = 0.9999,
+                        block_elems: int = 1 << 22) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorised RANSAC plane fit returning ``(plane_model, inlier_mask)``.
+
+    Hypotheses are scored in blocks as a single ``(N, B)`` matrix product,
+    with *B* chosen so that a block never exceeds *block_elems* distances.
+    Sampling stops early once *probability* confidence is reached for the
+    best inlier ratio seen so far (same criterion as Open3D). Without any
+    hypothesis (``num_iterations <= 0``) the result is ``(None, all False)``.
+    """
+    n = xyz.shape[0]
+    batch = max(1, min(num_iterations, block_elems // max(n, 1)))
+    best_count, best_model = -1, None
+    needed, done = num_iterations, 0
+    while done < needed:
+        count = min(batch, needed - done)
+        normals, offsets = _sample_planes(xyz, ransac_n, count, rng)
+        dist = np.abs(xyz @ normals.T.astype(xyz.dtype) + offsets.astype(xyz.dtype))
+        scores = np.count_nonzero(dist < distance_threshold, axis=0)
+        i = int(scores.argmax())
+        if scores[i] > best_count:
+            best_count = int(scores[i])
+            best_model = np.append(normals[i], offsets[i])
+            w = best_count / n
+            if w >= 1.0:
+                needed = done + count
+            else:
+                denom = np.log(1.0 - w ** ransac_n)   # 0 when w ** ransac_n underflows
+                if denom < 0.0:
+                    needed = min(needed, int(np.ceil(np.log(1.0 - probability) / denom)))
+        done += count
+    if best_model is None:   # no hypothesis drawn (num_iterations <= 0)
+        return None, np.zeros(n, dtype=bool)
+    inliers = np.abs(xyz @ best_model[:3] + best_model[3]) < distance_threshold
+    return best_model, inliers
+
+
+def _fit_plane_lsq(xyz: np.ndarray) -> np.ndarray:
+    """Least‑squares plane ``(a, b, c, d)`` through *xyz* (smallest principal axis)."""
+    centroid = xyz.mean(axis=0)
+    d = xyz - centroid
+    _, vecs = np.linalg.eigh(d.T @ d)
+    normal = vecs[:, 0].astype(np.float64)
+    return np.append(normal, -normal @ centroid)
+
+
 def remove_planes_ransac(pc: o3d.geometry.PointCloud,
                          distance_threshold: float = 0.01,
                          ransac_n: int = 3,
                          num_iterations: int = 1000,
-                         max_planes: int = 1) -> o3d.geometry.PointCloud:
-    """Iteratively segment and remove dominant planes."""
-    remaining = pc
+                         max_planes: int = 1,
+                         seed: Optional[int] = None,
+                         index: Optional[NeighborIndex] = None) -> o3d.geometry.PointCloud:
+    """Iteratively segment and remove dominant planes.
+
+    A single boolean *alive* mask over the input is updated for every plane,
+    and the output cloud is materialised only once at the end.
+    """
+    xyz = np.asarray(pc.points)
+    alive = np.ones(len(xyz), dtype=bool)
+    rng = np.random.default_rng(seed)
     for _ in range(max_planes):
-        if len(remaining.points) < 50:
+        idx = np.flatnonzero(alive)
+        if len(idx) < 50:
             break
-        plane_model, inliers = remaining.segment_plane(distance_threshold,
-                                                       ransac_n,
-                                                       num_iterations)
-        if len(inliers) / len(remaining.points) < 0.30:  # stop if plane is not big
+        _, inliers = _segment_plane_mask(xyz[idx].astype(np.float32), distance_threshold,
+                                         ransac_n, num_iterations, rng)
+        if inliers.sum() / len(idx) < 0.30:  # stop if plane is not big
             break
-        remaining = _select_by_index(remaining, list(set(range(len(remaining.points))) - set(inliers)))
-    return remaining
+        alive[idx[inliers]] = False
+    return _keep(pc, alive, index)
 
 # ---------- step 5a: bounding‑box crop ------------------------
 
 def crop_bounding_box(pc: o3d.geometry.PointCloud,
                       min_bound: Tuple[float, float, float],
-                      max_bound: Tuple[float, float, float]) -> o3d.geometry.PointCloud:
+                      max_bound: Tuple[float, float, float],
+                      index: Optional[NeighborIndex] = None) -> o3d.geometry.PointCloud:
     bbox = o3d.geometry.AxisAlignedBoundingBox(min_bound=min_bound, max_bound=max_bound)
+    if index is not None:
+        mask = np.zeros(len(pc.points), dtype=bool)
+        mask[bbox.get_point_indices_within_bounding_box(pc.points)] = True
+        return _keep(pc, mask, index)
     return pc.crop(bbox)
 
 # ---------- step 5b: Euclidean clustering ---------------------
 
+CLUSTER_METHODS = ('dbscan', 'grid')
+
+
+def cluster_labels(pc: o3d.geometry.PointCloud,
+                   eps: float = 0.02,
+                   min_points: int = 1000,
+                   method: str = 'dbscan',
+                   index: Optional[NeighborIndex] = None) -> np.ndarray:
+    """Per‑point cluster labels (-1 = noise).
+
+    ``dbscan``: density‑based, *min_points* neighbours within *eps* make a
+    core point. ``grid``: connected components of the *eps* occupancy grid,
+    components under *min_points* points are noise (see :func:`neighbors.grid_labels`).
+    """
+    if method == 'grid':
+        return nb.grid_labels(np.asarray(pc.points), eps, min_points)
+    if method != 'dbscan':
+        raise ValueError(f'Unknown clustering method {method!r}; available: {", ".join(CLUSTER_METHODS)}')
+    if index is not None:
+        return nb.dbscan_labels(index, eps, min_points)
+    return np.array(pc.cluster_dbscan(eps=eps, min_points=min_points, print_progress=False))
+
+
 def select_largest_cluster(pc: o3d.geometry.PointCloud,
                            eps: float = 0.02,
-                           min_points: int = 1000) -> o3d.geometry.PointCloud:
-    labels = np.array(pc.cluster_dbscan(eps=eps, min_points=min_points, print_progress=False))
-    if labels.size == 0:
-        return pc
+                           min_points: int = 1000,
+                           method: str = 'dbscan',
+                           if_none: str = 'keep',
+                           index: Optional[NeighborIndex] = None) -> o3d.geometry.PointCloud:
+    """Largest cluster of *pc*. When every point is noise, *if_none* = ``'keep'``
+    returns *pc* unchanged and ``'empty'`` returns an empty cloud (so "no object"
+    is visible downstream, e.g. to :class:`tracking.ROITracker`)."""
+    if if_none not in ('keep', 'empty'):
+        raise ValueError(f"if_none must be 'keep' or 'empty', got {if_none!r}")
+    labels = cluster_labels(pc, eps, min_points, method, index)
+    if labels.size == 0 or labels.max() < 0:
+        return pc if if_none == 'keep' else _keep(pc, np.zeros(len(labels), dtype=bool), index)
     largest_label = int(np.bincount(labels[labels >= 0]).argmax())
-    indices = np.where(labels == largest_label)[0]
-    return _select_by_index(pc, indices)
+    return _keep(pc, labels == largest_label, index)
 
 # ---------- step 6: normals & curvature -----------------------
 
-def estimate_normals(pc: o3d.geometry.PointCloud, k: int = 30) -> o3d.geometry.PointCloud:
+def estimate_normals(pc: o3d.geometry.PointCloud,
+                     k: int = 30,
+                     index: Optional[NeighborIndex] = None) -> o3d.geometry.PointCloud:
+    if not pc.has_points():
+        return pc
+    if index is not None:
+        pc.normals = o3d.utility.Vector3dVector(nb.knn_normals(index, k).astype(np.float64))
+        return pc
     pc.estimate_normals(search_param=o3d.geometry.KDTreeSearchParamKNN(k))
     pc.normalize_normals()
     return pc
@@ -90,9 +240,11 @@ def estimate_normals(pc: o3d.geometry.PointCloud, k: int = 30) -> o3d.geometry.P
 # ---------- step 7: centering + scale -------------------------
 
 def center_and_scale(pc: o3d.geometry.PointCloud) -> Tuple[o3d.geometry.PointCloud, float]:
+    if not pc.has_points():  # e.g. "no object" frame of a live stream
+        return pc, 1.0
     center = pc.get_center()
     pc.translate(-center)
     bbox = pc.get_axis_aligned_bounding_box()
-    scale = 1.0 / max(bbox.extent)
+    scale = 1.0 / max(bbox.get_extent())
     pc.scale(scale, center=(0., 0., 0.))
     return pc, scale
\ No newline at end of file
@@ -0,0 +1,228 @@
+"""Shared neighbour‑search index reused across pipeline stages.
+
+SOR, ROR, normals and clustering all need the neighbourhood of every point.
+Instead of letting each Open3D call build its own KD‑tree, the pipeline keeps
+one :class:`NeighborIndex` per cloud state: the kNN graph and radius graphs
+are computed lazily, reused by consecutive stages and *compacted* (not
+rebuilt) when a stage only removes points.
+"""
+from __future__ import annotations
+
+import numpy as np
+import open3d as o3d
+from typing import Dict, Optional, Tuple
+
+
+class NeighborIndex:
+    """kNN + radius graphs over a fixed set of points.
+
+    ``knn_idx``/``knn_dist`` are ``(N, k)`` arrays sorted by distance, the
+    point itself first. After :meth:`keep`, neighbours that were removed are
+    marked with index ``-1`` and distance ``inf`` at the end of each row.
+    """
+    def __init__(self, points: np.ndarray, k: int = 30, min_valid: float = 0.5):
+        self.points = np.ascontiguousarray(points, dtype=np.float32)
+        self.k = k
+        self.min_valid = min_valid          # rebuild kNN below this fraction of live neighbours
+        self.knn_idx: Optional[np.ndarray] = None
+        self.knn_dist: Optional[np.ndarray] = None
+        self._radius: Dict[float, Tuple[np.ndarray, np.ndarray]] = {}
+        self.builds = 0                     # number of tree constructions, for profiling
+
+    @classmethod
+    def from_pointcloud(cls, pc: o3d.geometry.PointCloud, k: int = 30) -> 'NeighborIndex':
+        return cls(np.asarray(pc.points), k)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    # -----------------------------------------------------
+    def _nns(self) -> o3d.core.nns.NearestNeighborSearch:
+        self.builds += 1
+        return o3d.core.nns.NearestNeighborSearch(o3d.core.Tensor(self.points))
+
+    def _build_knn(self, k: int) -> None:
+        k = max(1, min(k, len(self)))
+        nns = self._nns()
+        nns.knn_index()
+        idx, d2 = nns.knn_search(o3d.core.Tensor(self.points), k)
+        self.k = k
+        self.knn_idx = idx.numpy()
+        self.knn_dist = np.sqrt(d2.numpy())
+
+    def knn(self, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(indices, distances)`` of the *k* nearest neighbours (self included)."""
+        if self.knn_idx is None or k > self.k:
+            self._build_knn(max(k, self.k))
+        return self.knn_idx[:, :k], self.knn_dist[:, :k]
+
+    def radius_graph(self, radius: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the CSR ``(indices, splits)`` of all neighbours within *radius* (self included)."""
+        if radius not in self._radius:
+            nns = self._nns()
+            nns.fixed_radius_index(radius)
+            idx, _, splits = nns.fixed_radius_search(o3d.core.Tensor(self.points), radius)
+            self._radius[radius] = (idx.numpy(), splits.numpy())
+        return self._radius[radius]
+
+    # -----------------------------------------------------
+    def keep(self, mask: np.ndarray) -> None:
+        """Drop the points where *mask* is False, remapping the cached graphs in place."""
+        if mask.all():
+            return
+        remap = np.full(len(self), -1, dtype=np.int64)
+        remap[mask] = np.arange(int(mask.sum()))
+        self.points = self.points[mask]
+
+        if self.knn_idx is not None:
+            idx = remap[self.knn_idx[mask]]
+            dist = self.knn_dist[mask]
+            dead = idx < 0
+            order = np.argsort(dead, axis=1, kind='stable')   # live neighbours first
+            idx = np.take_along_axis(idx, order, axis=1)
+            dist = np.take_along_axis(dist, order, axis=1)
+            dist[np.take_along_axis(dead, order, axis=1)] = np.inf
+            if len(self) and (idx >= 0).sum(axis=1).mean() < self.min_valid * self.k:
+                self.knn_idx = self.knn_dist = None      # too sparse: rebuild lazily
+            else:
+                self.knn_idx, self.knn_dist = idx, dist
+
+        for radius, (idx, splits) in list(self._radius.items()):
+            counts = np.diff(splits)
+            row = np.repeat(np.arange(len(mask)), counts)
+            new = remap[idx]
+            live = mask[row] & (new >= 0)
+            counts = np.bincount(row[live], minlength=len(mask))[mask]
+            self._radius[radius] = (new[live], np.concatenate(([0], np.cumsum(counts))))
+
+    def rescale(self, points: np.ndarray, scale: float) -> None:
+        """Follow a similarity transform of the cloud (neighbourhoods are unchanged)."""
+        self.points = np.ascontiguousarray(points, dtype=np.float32)
+        if self.knn_dist is not None:
+            self.knn_dist = self.knn_dist * scale
+        self._radius = {r * scale: g for r, g in self._radius.items()}
+
+# ---------- index‑based stage kernels -------------------------
+
+def statistical_keep(index: NeighborIndex, nb_neighbors: int, std_ratio: float) -> np.ndarray:
+    """Keep mask of Open3D's statistical outlier removal, from the shared kNN graph."""
+    if len(index) == 0:
+        return np.zeros(0, dtype=bool)
+    _, dist = index.knn(nb_neighbors)
+    live = np.isfinite(dist)
+    avg = np.where(live, dist, 0).sum(axis=1) / np.maximum(live.sum(axis=1), 1)
+    return avg <= avg.mean() + std_ratio * avg.std()
+
+
+def radius_keep(index: NeighborIndex, nb_points: int, radius: float) -> np.ndarray:
+    """Keep mask of Open3D's radius outlier removal (self counts as a neighbour)."""
+    if len(index) == 0:
+        return np.zeros(0, dtype=bool)
+    if nb_points <= index.k:
+        _, dist = index.knn(nb_points)
+        return (dist <= radius).sum(axis=1) >= nb_points
+    _, splits = index.radius_graph(radius)
+    return np.diff(splits) >= nb_points
+
+
+def knn_normals(index: NeighborIndex, k: int) -> np.ndarray:
+    """PCA normals from the *k* nearest live neighbours, batched over all points."""
+    idx, _ = index.knn(k)
+    live = idx >= 0
+    nbrs = index.points[np.where(live, idx, np.arange(len(idx))[:, None])]   # pad with self
+    w = live[..., None].astype(np.float32)
+    cnt = np.maximum(w.sum(axis=1), 1)
+    mean = (nbrs * w).sum(axis=1) / cnt
+    d = (nbrs - mean[:, None, :]) * w
+    cov = np.einsum('nki,nkj->nij', d, d) / cnt[..., None]
+    _, vecs = np.linalg.eigh(cov)
+    normals = vecs[:, :, 0]
+    normals[live.sum(axis=1) < 3] = (0.0, 0.0, 1.0)
+    return normals
+
+
+def dbscan_labels(index: NeighborIndex, eps: float, min_points: int) -> np.ndarray:
+    """DBSCAN labels (-1 = noise) from the shared radius graph.
+
+    Core points are joined by min‑label propagation with pointer jumping;
+    border points take the label of one of their core neighbours.
+    """
+    idx, splits = index.radius_graph(eps)
+    n = len(index)
+    counts = np.diff(splits)
+    core = counts >= min_points
+    rows = np.repeat(np.arange(n), counts)
+    cc = core[rows] & core[idx]
+    r, c = rows[cc], idx[cc]
+
+    labels = _min_label_components(n, r, c)
+
+    out = np.full(n, -1, dtype=np.int64)
+    out[core] = labels[core]
+    border = ~core[rows] & core[idx]
+    out[rows[border]] = labels[idx[border]]
+    return out
+
+
+def _min_label_components(n: int, r: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """Connected components of the graph with edges ``r -> c`` (*r* sorted, edges symmetric).
+
+    Every node takes the smallest label among its neighbours, with pointer
+    jumping so long chains collapse in O(log n) rounds. Labels are node ids.
+    """
+    starts = np.flatnonzero(np.r_[True, r[1:] != r[:-1]]) if len(r) else np.zeros(0, int)
+    heads = r[starts]
+    labels = np.arange(n)
+    while True:
+        new = labels.copy()
+        if len(r):
+            new[heads] = np.minimum(new[heads], np.minimum.reduceat(labels[c], starts))
+        new = new[new]
+        if np.array_equal(new, labels):
+            return labels
+        labels = new
+
+
+# the 13 "forward" offsets of the 26‑neighbourhood; edges are mirrored afterwards
+_HALF_NEIGHBOURHOOD = np.array([(dx, dy, dz)
+                                for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+                                if (dx, dy, dz) > (0, 0, 0)], dtype=np.int64)
+
+
+def grid_labels(points: np.ndarray, eps: float, min_points: int = 1) -> np.ndarray:
+    """Connected components of the occupancy grid at *eps* resolution (-1 = too small).
+
+    Points are hashed to voxels of side *eps*; two occupied voxels are
+    connected when they touch (26‑neighbourhood). Components with fewer than
+    *min_points* points are labelled -1. Much cheaper than DBSCAN since the
+    work is proportional to the number of occupied voxels, not of neighbour
+    pairs, at the price of a slightly looser linkage (up to ~2·√3·eps).
+    """
+    n = len(points)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    cells = np.floor(np.asarray(points, dtype=np.float64) / eps).astype(np.int64)
+    cells -= cells.min(axis=0) - 1                     # >= 1 so that offsets -1 stay >= 0
+    dims = cells.max(axis=0) + 2
+    keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+    voxels, inverse = np.unique(keys, return_inverse=True)
+    m = len(voxels)
+
+    strides = np.array([dims[1] * dims[2], dims[2], 1], dtype=np.int64)
+    rows, cols = [], []
+    for off in _HALF_NEIGHBOURHOOD @ strides:
+        pos = np.searchsorted(voxels, voxels + off)
+        pos[pos == m] = 0
+        hit = voxels[pos] == voxels + off
+        rows.append(np.flatnonzero(hit))
+        cols.append(pos[hit])
+    a, b = np.concatenate(rows), np.concatenate(cols)
+    r, c = np.r_[a, b], np.r_[b, a]
+    order = np.argsort(r, kind='stable')
+    voxel_labels = _min_label_components(m, r[order], c[order])
+
+    labels = voxel_labels[inverse.ravel()]
+    _, labels, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+    labels = labels.ravel().astype(np.int64)
+    labels[sizes[labels] < min_points] = -1
+    return labels
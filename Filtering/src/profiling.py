@@ -0,0 +1,104 @@
+"""Per‑stage timing and point‑count instrumentation for the pipeline.
+
+Attach a :class:`Profiler` to ``PointCloudPipeline.profiler``; every stage
+then records wall time, CPU time, input/output point counts and (optionally)
+peak traced memory. Samples are kept in a rolling window per stage so
+percentiles stay meaningful in streaming use. With no profiler attached the
+pipeline does not time anything.
+"""
+from __future__ import annotations
+
+import json
+import time
+import tracemalloc
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Deque, Dict, NamedTuple, Union
+
+import numpy as np
+
+
+class StageSample(NamedTuple):
+    wall: float      # seconds
+    cpu: float       # seconds (process time, all threads)
+    n_in: int
+    n_out: int
+    peak_mem: int    # peak bytes traced by tracemalloc during the stage, above what was
+                     # already allocated when it started (0 when memory tracking is off)
+
+
+class Profiler:
+    """Rolling per‑stage statistics.
+
+    *memory* turns on :mod:`tracemalloc`; it only sees Python/NumPy
+    allocations (not Open3D's C++ buffers) and slows allocations down, so it
+    is off by default.
+    """
+    def __init__(self, window: int = 1000, memory: bool = False):
+        self.window = window
+        self.memory = memory
+        self.frames = 0
+        self._samples: Dict[str, Deque[StageSample]] = OrderedDict()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    # -----------------------------------------------------
+    def start(self) -> tuple:
+        current = 0
+        if self.memory:
+            tracemalloc.reset_peak()   # peak := current, not 0: subtract it in stop()
+            current = tracemalloc.get_traced_memory()[0]
+        return time.perf_counter(), time.process_time(), current
+
+    def stop(self, name: str, token: tuple, n_in: int, n_out: int) -> None:
+        wall, cpu = time.perf_counter() - token[0], time.process_time() - token[1]
+        peak = tracemalloc.get_traced_memory()[1] - token[2] if self.memory else 0
+        if name not in self._samples:
+            self._samples[name] = deque(maxlen=self.window)
+        self._samples[name].append(StageSample(wall, cpu, n_in, n_out, peak))
+
+    def end_frame(self) -> None:
+        self.frames += 1
+
+    # -----------------------------------------------------
+    def summary(self) -> Dict[str, dict]:
+        """Per‑stage statistics over the current window (times in ms)."""
+        out = OrderedDict()
+        for name, samples in self._samples.items():
+            a = np.array(samples, dtype=np.float64)
+            wall_ms = a[:, 0] * 1e3
+            p50, p95, p99 = np.percentile(wall_ms, [50, 95, 99])
+            out[name] = {
+                'count': len(a),
+                'wall_ms_mean': float(wall_ms.mean()),
+                'wall_ms_p50': float(p50),
+                'wall_ms_p95': float(p95),
+                'wall_ms_p99': float(p99),
+                'cpu_ms_mean': float(a[:, 1].mean() * 1e3),
+                'points_in_mean': float(a[:, 2].mean()),
+                'points_out_mean': float(a[:, 3].mean()),
+                'peak_mem_mb_max': float(a[:, 4].max() / 2**20),
+            }
+        return out
+
+    def to_json(self, path: Union[str, Path]) -> None:
+        with open(path, 'w') as f:
+            json.dump({'frames': self.frames, 'window': self.window, 'stages': self.summary()}, f, indent=2)
+
+    def table(self) -> str:
+        stats = self.summary()
+        head = f'{"stage":<10} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"cpu ms":>8} {"pts in":>9} {"pts out":>9}'
+        if self.memory:
+            head += f' {"mem MB":>7}'
+        lines = [head, '-' * len(head)]
+        total = 0.0
+        for name, s in stats.items():
+            total += s['wall_ms_p50']
+            line = (f'{name:<10} {s["wall_ms_p50"]:8.2f} {s["wall_ms_p95"]:8.2f} {s["wall_ms_p99"]:8.2f} '
+                    f'{s["cpu_ms_mean"]:8.2f} {s["points_in_mean"]:9.0f} {s["points_out_mean"]:9.0f}')
+            if self.memory:
+                line += f' {s["peak_mem_mb_max"]:7.1f}'
+            lines.append(line)
+        lines.append('-' * len(head))
+        lines.append(f'{"sum p50":<10} {total:8.2f}   ({self.frames} frames)')
+        return '\n'.join(lines)
@@ -1,39 +1,199 @@
 """Minimal RealSense frame capture to Open3D point‑cloud."""
+from __future__ import annotations
+
+import queue
+import threading
+from typing import Iterator, Optional, Tuple
+
 import pyrealsense2 as rs
 import numpy as np
 import open3d as o3d
 
+from organized import Intrinsics
 
-def capture_pointcloud(device_index: int = 0, frames: int = 30) -> o3d.geometry.PointCloud:
-    pipe = rs.pipeline()
+
+def _make_config(device_index: Optional[int], width: int, height: int, fps: int) -> rs.config:
     cfg = rs.config()
-    cfg.enable_device_from_file(False)
-    cfg.enable_stream(rs.stream.depth, 640, 480, rs.format.z16, 30)
-    cfg.enable_stream(rs.stream.color, 640, 480, rs.format.bgr8, 30)
+    cfg.enable_stream(rs.stream.depth, width, height, rs.format.z16, fps)
+    cfg.enable_stream(rs.stream.color, width, height, rs.format.bgr8, fps)
     if device_index is not None:
-        cfg.enable_device_from_file(False)
-    pipe.start(cfg)
+        devices = rs.context().query_devices()
+        if device_index >= len(devices):
+            raise RuntimeError(f'RealSense device {device_index} not found ({len(devices)} connected)')
+        cfg.enable_device(devices[device_index].get_info(rs.camera_info.serial_number))
+    return cfg
+
+
+def points_to_tensor(points: rs.points,
+                     color: Optional[rs.video_frame] = None) -> o3d.t.geometry.PointCloud:
+    """Convert an ``rs.points`` frame to a float32 tensor point‑cloud.
+
+    Vertices are viewed in place as float32, invalid (z == 0) pixels are
+    dropped with one vectorised mask, and colours are fetched through the
+    SDK texture coordinates with a single gather into the colour image.
+    The compacted arrays are handed to Open3D with ``Tensor.from_numpy``
+    (shared memory, no float64 round trip).
+    """
+    verts = np.asanyarray(points.get_vertices()).view(np.float32).reshape(-1, 3)
+    valid = verts[:, 2] > 0
+    pcd = o3d.t.geometry.PointCloud(o3d.core.Tensor.from_numpy(verts[valid]))
+    if color is not None:
+        img = np.asanyarray(color.get_data())
+        h, w = img.shape[:2]
+        uv = np.asanyarray(points.get_texture_coordinates()).view(np.float32).reshape(-1, 2)[valid]
+        col = np.clip((uv[:, 0] * w).astype(np.int32), 0, w - 1)
+        row = np.clip((uv[:, 1] * h).astype(np.int32), 0, h - 1)
+        bgr = img.reshape(-1, 3)[row * w + col]
+        rgb = np.ascontiguousarray(bgr[:, ::-1], dtype=np.float32) * np.float32(1 / 255)
+        pcd.point.colors = o3d.core.Tensor.from_numpy(rgb)
+    return pcd
 
-    for _ in range(frames):
-        pipe.wait_for_frames()
-    frameset = pipe.wait_for_frames()
+
+def _frames_to_tensor(frameset: rs.composite_frame, pc: rs.pointcloud) -> o3d.t.geometry.PointCloud:
     depth = frameset.get_depth_frame()
     color = frameset.get_color_frame()
 
-    # Point‑cloud generation
-    pc = rs.pointcloud()
+    # Point‑cloud generation (texture coordinates map every vertex into `color`)
     pc.map_to(color)
-    points = pc.calculate(depth)
+    return points_to_tensor(pc.calculate(depth), color)
+
+
+class CaptureSession:
+    """Long‑lived RealSense capture that keeps the sensor streaming.
+
+    A background thread pulls framesets into a bounded queue; when the
+    consumer falls behind, the oldest frame is dropped so :meth:`read`
+    always returns the freshest cloud available.
+
+    >>> with CaptureSession(device_index=0) as cam:
+    ...     for pc in cam:
+    ...         ...
+    """
+    def __init__(self,
+                 device_index: Optional[int] = 0,
+                 warmup: int = 30,
+                 queue_size: int = 2,
+                 width: int = 640,
+                 height: int = 480,
+                 fps: int = 30):
+        self.device_index = device_index
+        self.warmup = warmup
+        self.width, self.height, self.fps = width, height, fps
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self._pipe: Optional[rs.pipeline] = None
+        self._pc = rs.pointcloud()
+        self._align = rs.align(rs.stream.depth)
+        self.intrinsics: Optional[Intrinsics] = None
+        self.depth_scale = 0.001
+        self._thread: Optional[threading.Thread] = None
+        self._running = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    # -----------------------------------------------------
+    def start(self) -> 'CaptureSession':
+        if self._pipe is not None:
+            return self
+        self._pipe = rs.pipeline()
+        profile = self._pipe.start(_make_config(self.device_index, self.width, self.height, self.fps))
+        self.depth_scale = profile.get_device().first_depth_sensor().get_depth_scale()
+        depth_profile = profile.get_stream(rs.stream.depth).as_video_stream_profile()
+        self.intrinsics = Intrinsics.from_rs(depth_profile.get_intrinsics())
+        for _ in range(self.warmup):  # let auto‑exposure settle
+            self._pipe.wait_for_frames()
+        self._running.set()
+        self._thread = threading.Thread(target=self._reader, name='rs-capture', daemon=True)
+        self._thread.start()
+        return self
 
-    # Convert to Open3D
-    verts = np.asarray(points.get_vertices()).view(np.float32).reshape(-1, 3)
-    colors = np.asarray(color.get_data()).reshape(480, 640, 3)
-    colors = colors.astype(np.float32) / 255.0
-    colors = colors.reshape(-1, 3)
+    def stop(self) -> None:
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._pipe is not None:
+            self._pipe.stop()
+            self._pipe = None
+        while not self._queue.empty():
+            self._queue.get_nowait()
 
-    o3d_pc = o3d.geometry.PointCloud()
-    o3d_pc.points = o3d.utility.Vector3dVector(verts)
-    o3d_pc.colors = o3d.utility.Vector3dVector(colors)
+    def __enter__(self) -> 'CaptureSession':
+        return self.start()
 
-    pipe.stop()
-    return o3d_pc
\ No newline at end of file
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # -----------------------------------------------------
+    def _reader(self) -> None:
+        try:
+            while self._running.is_set():
+                frameset = self._pipe.wait_for_frames()
+                frameset.keep()  # hold the frame outside the SDK pool
+                while True:
+                    try:
+                        self._queue.put_nowait(frameset)
+                        break
+                    except queue.Full:  # drop the stale frame, keep the fresh one
+                        try:
+                            self._queue.get_nowait()
+                            self.dropped += 1
+                        except queue.Empty:
+                            pass
+        except BaseException as exc:  # surfaced to the consumer in read()
+            self._error = exc
+            self._running.clear()
+
+    def _next_frameset(self, timeout: float) -> rs.composite_frame:
+        if self._pipe is None:
+            raise RuntimeError('CaptureSession is not started')
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            if self._error is not None:
+                raise RuntimeError('RealSense capture thread failed') from self._error
+            raise RuntimeError(f'No RealSense frame within {timeout:.1f} s')
+
+    def read(self, timeout: float = 5.0) -> o3d.geometry.PointCloud:
+        """Block until the next (freshest) frame and return it as a point‑cloud."""
+        return self.read_tensor(timeout).to_legacy()
+
+    def read_tensor(self, timeout: float = 5.0) -> o3d.t.geometry.PointCloud:
+        """Like :meth:`read` but keep the float32 tensor cloud (no legacy float64 copy)."""
+        return _frames_to_tensor(self._next_frameset(timeout), self._pc)
+
+    def read_depth(self, timeout: float = 5.0) -> Tuple[np.ndarray, np.ndarray, Intrinsics, float]:
+        """Return ``(depth z16, bgr8 colour aligned to depth, intrinsics, depth_scale)``.
+
+        Feed the result to ``PointCloudPipeline.process_depth`` for the organised path.
+        """
+        frameset = self._align.process(self._next_frameset(timeout))
+        depth = np.asanyarray(frameset.get_depth_frame().get_data())
+        colors = np.asanyarray(frameset.get_color_frame().get_data())
+        return depth, colors, self.intrinsics, self.depth_scale
+
+    def __iter__(self) -> Iterator[o3d.geometry.PointCloud]:
+        while True:
+            yield self.read()
+
+
+def stream_pointclouds(pipeline,
+                       device_index: Optional[int] = 0,
+                       frames: int = 30,
+                       queue_size: int = 2,
+                       organized: bool = False) -> Iterator[o3d.geometry.PointCloud]:
+    """Yield filtered clouds continuously from a live camera through *pipeline*.
+
+    With *organized*, frames go through ``pipeline.process_depth`` instead.
+    """
+    with CaptureSession(device_index=device_index, warmup=frames, queue_size=queue_size) as cam:
+        while True:
+            if organized:
+                depth, colors, intrinsics, scale = cam.read_depth()
+                yield pipeline.process_depth(depth, intrinsics, scale, colors)
+            else:
+                yield pipeline(cam.read())
+
+
+def capture_pointcloud(device_index: int = 0, frames: int = 30) -> o3d.geometry.PointCloud:
+    with CaptureSession(device_index=device_index, warmup=frames) as cam:
+        return cam.read()
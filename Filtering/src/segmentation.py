@@ -0,0 +1,87 @@
+"""Multi‑object result of the pipeline (see :meth:`PointCloudPipeline.segment`).
+
+Every cluster is described by an index array into one shared point buffer,
+so downstream code (shape detection, grasping) can evaluate every candidate
+object without re‑filtering the scene or copying it per object.
+"""
+from __future__ import annotations
+
+import numpy as np
+import open3d as o3d
+from typing import Iterator, List, NamedTuple
+
+
+class SegmentedObject(NamedTuple):
+    label: int
+    indices: np.ndarray      # rows of Segmentation.points
+    centroid: np.ndarray     # mean position (m)
+    extent: np.ndarray       # axis‑aligned size (m)
+    scale: float             # factor center_and_scale() would apply (1 / largest extent)
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+
+class Segmentation:
+    """All clusters of a filtered scene, largest first.
+
+    :attr:`pc` is the filtered (un‑normalised) scene and :attr:`labels` its
+    per‑point cluster labels (-1 = noise); the ``indices`` of the objects are
+    slices of a single sorted index array.
+    """
+    def __init__(self, pc: o3d.geometry.PointCloud, labels: np.ndarray):
+        self.pc = pc
+        self.labels = labels
+        self.objects: List[SegmentedObject] = []
+        valid = np.flatnonzero(labels >= 0)
+        if len(valid) == 0:
+            return
+        order = valid[np.argsort(labels[valid], kind='stable')]
+        lab = labels[order]
+        starts = np.flatnonzero(np.r_[True, lab[1:] != lab[:-1]])
+        xyz = self.points[order]
+        sums = np.add.reduceat(xyz, starts)
+        lo, hi = np.minimum.reduceat(xyz, starts), np.maximum.reduceat(xyz, starts)
+        for i, idx in enumerate(np.split(order, starts[1:])):
+            extent = hi[i] - lo[i]
+            largest = float(extent.max())
+            self.objects.append(SegmentedObject(int(lab[starts[i]]), idx, sums[i] / len(idx), extent,
+                                                1.0 / largest if largest > 0 else 1.0))
+        self.objects.sort(key=len, reverse=True)
+
+    @property
+    def points(self) -> np.ndarray:
+        """``(N, 3)`` view of the shared point buffer."""
+        return np.asarray(self.pc.points)
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def __iter__(self) -> Iterator[SegmentedObject]:
+        return iter(self.objects)
+
+    def __getitem__(self, i: int) -> SegmentedObject:
+        return self.objects[i]
+
+    # -----------------------------------------------------
+    def normalized_points(self, i: int) -> np.ndarray:
+        """Points of object *i* centred on its centroid and scaled to unit size."""
+        obj = self.objects[i]
+        return (self.points[obj.indices] - obj.centroid) * obj.scale
+
+    def cloud(self, i: int, normalize: bool = False) -> o3d.geometry.PointCloud:
+        """Object *i* as its own point cloud (a copy, with colours and normals)."""
+        obj = self.objects[i]
+        pc = self.pc.select_by_index(obj.indices)
+        if normalize:
+            pc.translate(-obj.centroid)
+            pc.scale(obj.scale, center=np.zeros(3))
+        return pc
+
+    def summary(self) -> str:
+        lines = [f'{len(self)} object(s) out of {len(self.points)} points']
+        for i, obj in enumerate(self.objects):
+            c, e = obj.centroid, obj.extent
+            lines.append(f'  #{i}: {len(obj):7d} pts  centre ({c[0]:+.3f}, {c[1]:+.3f}, {c[2]:+.3f}) m  '
+                         f'size {e[0]:.3f} x {e[1]:.3f} x {e[2]:.3f} m')
+        return '\n'.join(lines)
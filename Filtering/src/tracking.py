@@ -0,0 +1,148 @@
+"""Stateful, frame‑to‑frame stages for live streams.
+
+In a continuous capture the scene barely changes between frames, so these
+stages carry what they found in the previous frame over to the next one
+and only fall back to the full, scene‑wide computation when that guess
+stops explaining the data. Call ``reset()`` when the stream restarts.
+"""
+from __future__ import annotations
+
+import numpy as np
+import open3d as o3d
+from typing import List, Optional
+
+from filters import _fit_plane_lsq, _keep, _segment_plane_mask
+from neighbors import NeighborIndex
+
+# ---------- step 3: plane removal with warm start -------------
+
+class PlaneTracker:
+    """Plane removal that warm‑starts from the previous frame's planes.
+
+    For every plane slot the previous model is tried first with a single
+    vectorised inlier check. It is kept if its inlier ratio is still at
+    least *min_inlier_ratio* and has not dropped below *track_ratio* times
+    the ratio it had when it was accepted; its inliers are then refitted by
+    least squares for the next frame. Otherwise full RANSAC (same engine as
+    :func:`filters.remove_planes_ransac`) runs for that slot.
+    """
+    def __init__(self,
+                 distance_threshold: float = 0.01,
+                 ransac_n: int = 3,
+                 num_iterations: int = 1000,
+                 max_planes: int = 1,
+                 min_inlier_ratio: float = 0.30,
+                 track_ratio: float = 0.8,
+                 seed: Optional[int] = None):
+        self.distance_threshold = distance_threshold
+        self.ransac_n = ransac_n
+        self.num_iterations = num_iterations
+        self.max_planes = max_planes
+        self.min_inlier_ratio = min_inlier_ratio
+        self.track_ratio = track_ratio
+        self.rng = np.random.default_rng(seed)
+        self.models: List[np.ndarray] = []
+        self.ratios: List[float] = []
+        self.tracked = 0     # plane slots served by the previous model
+        self.searched = 0    # plane slots that needed full RANSAC
+
+    def reset(self) -> None:
+        self.models, self.ratios = [], []
+
+    def _inliers(self, xyz: np.ndarray, model: np.ndarray) -> np.ndarray:
+        return np.abs(xyz @ model[:3].astype(xyz.dtype) + model[3]) < self.distance_threshold
+
+    def __call__(self,
+                 pc: o3d.geometry.PointCloud,
+                 index: Optional[NeighborIndex] = None) -> o3d.geometry.PointCloud:
+        xyz = np.asarray(pc.points)
+        alive = np.ones(len(xyz), dtype=bool)
+        models, ratios = [], []
+        for slot in range(self.max_planes):
+            idx = np.flatnonzero(alive)
+            if len(idx) < 50:
+                break
+            sub = xyz[idx].astype(np.float32)
+
+            inliers = None
+            if slot < len(self.models):
+                cand = self._inliers(sub, self.models[slot])
+                ratio = cand.mean()
+                if ratio >= self.min_inlier_ratio and ratio >= self.track_ratio * self.ratios[slot]:
+                    inliers, ref_ratio = cand, max(ratio, self.ratios[slot])
+                    self.tracked += 1
+            if inliers is None:
+                _, inliers = _segment_plane_mask(sub, self.distance_threshold, self.ransac_n,
+                                                 self.num_iterations, self.rng)
+                ratio = ref_ratio = inliers.mean()
+                self.searched += 1
+                if ratio < self.min_inlier_ratio:  # stop if plane is not big
+                    break
+
+            model = _fit_plane_lsq(sub[inliers])
+            if slot < len(self.models) and model[:3] @ self.models[slot][:3] < 0:
+                model = -model  # keep a consistent orientation across frames
+            models.append(model)
+            ratios.append(float(ref_ratio))
+            alive[idx[inliers]] = False
+
+        self.models, self.ratios = models, ratios
+        return _keep(pc, alive, index)
+
+# ---------- step 5: region of interest around the last object -
+
+class ROITracker:
+    """Crop each frame to the neighbourhood of the previously selected object.
+
+    The tracker watches the output of the ``cluster`` stage (see
+    :attr:`observes`) and remembers its axis‑aligned box. On the next frame
+    it crops to that box grown by *margin* metres, so the stages after it
+    only see an object‑sized cloud. The full scene is passed through every
+    *refresh_every* frames, and immediately after a loss (the selected
+    cluster shrank below *lost_ratio* of its previous size).
+    """
+    observes = 'cluster'
+    # merged into the observed stage's arguments: a frame without any cluster
+    # yields an empty cloud instead of the whole (cropped) input, so it counts as lost
+    observed_kwargs = {'if_none': 'empty'}
+
+    def __init__(self,
+                 margin: float = 0.05,
+                 refresh_every: int = 30,
+                 lost_ratio: float = 0.5):
+        self.margin = margin
+        self.refresh_every = refresh_every
+        self.lost_ratio = lost_ratio
+        self.reset()
+        self.cropped = 0     # frames served from the ROI
+        self.full = 0        # frames that saw the whole scene
+
+    def reset(self) -> None:
+        self.box: Optional[np.ndarray] = None   # (2, 3): min, max
+        self.count = 0
+        self._since_full = 0
+        self._cropping = False
+
+    def __call__(self,
+                 pc: o3d.geometry.PointCloud,
+                 index: Optional[NeighborIndex] = None) -> o3d.geometry.PointCloud:
+        if self.box is None or self._since_full >= self.refresh_every:
+            self._cropping, self._since_full = False, 0
+            self.full += 1
+            return pc
+        self._cropping = True
+        self._since_full += 1
+        self.cropped += 1
+        xyz = np.asarray(pc.points)
+        mask = np.all((xyz >= self.box[0]) & (xyz <= self.box[1]), axis=1)
+        return _keep(pc, mask, index)
+
+    def update(self, pc: o3d.geometry.PointCloud) -> None:
+        """Record the selected object of this frame (output of the observed stage)."""
+        n = len(pc.points)
+        if n == 0 or (self._cropping and n < self.lost_ratio * self.count):
+            self.box = None  # lost: next frame runs on the full scene
+            return
+        xyz = np.asarray(pc.points)
+        self.box = np.stack([xyz.min(axis=0) - self.margin, xyz.max(axis=0) + self.margin])
+        self.count = n
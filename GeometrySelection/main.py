@@ -1,7 +1,7 @@
 import argparse
 from pathlib import Path
 
-from shape_detector import io, detect, visualize
+from shape_detector import io, detect
 
 
 def parse_args():
@@ -9,13 +9,56 @@ def parse_args():
     g = p.add_mutually_exclusive_group(required=True)
     g.add_argument("--input", type=Path, help="Path to .ply/.pcd/.xyz file")
     g.add_argument("--live", action="store_true", help="Capture one frame from RealSense")
+    g.add_argument("--batch", type=Path, help="Labelled directory: report confusion matrix and latency")
+    g.add_argument("--serve", action="store_true",
+                   help="Keep the detector warm and serve clients on a Unix socket")
+    p.add_argument("--socket", default=None, help="Socket path for --serve (default: /tmp/shape_detector.sock)")
+    p.add_argument("--workers", "-j", type=int, help="Processes for --batch (default: all cores)")
+    p.add_argument("--sweep", nargs="+", default=[], metavar="NAME=V1,V2",
+                   help="Threshold values to sweep in --batch, e.g. iso_thr=0.1,0.15,0.2")
+    p.add_argument("--loop", action="store_true",
+                   help="With --live: classify frames continuously (cached, majority-voted label)")
     p.add_argument("--visualize", action="store_true", help="Show Open3D viewer")
-    return p.parse_args()
+    args = p.parse_args()
+    try:
+        args.sweep = {k: [float(v) for v in vals.split(",")]
+                      for k, _, vals in (s.partition("=") for s in args.sweep)}
+    except ValueError:
+        p.error("--sweep expects NAME=V1,V2,...")
+    return args
+
+
+def run_loop() -> None:
+    """Live classification until Ctrl-C, reusing results while the object does not change."""
+    from shape_detector.cache import ShapeCache
+    cache = ShapeCache()
+    try:
+        for n, pcd in enumerate(io.stream_realsense_frames(), 1):
+            result = cache.classify(pcd)
+            print(f"\rframe {n:5d}  {result.label:<14} tier {result.tier:<11} "
+                  f"{sum(result.timings.values()):6.1f} ms  (cache hits {cache.hits}/{n})", end="")
+    except KeyboardInterrupt:
+        print()
 
 
 def main() -> None:
     args = parse_args()
 
+    if args.serve:
+        from shape_detector import service
+        service.serve(args.socket or service.DEFAULT_SOCKET)
+        return
+
+    if args.batch:
+        from shape_detector import batch
+        combos, preds, elapsed = batch.run_batch(args.batch, args.sweep, args.workers)
+        print(batch.report(combos, preds, elapsed))
+        return
+
+    if args.live and args.loop:
+        run_loop()
+        return
+
     if args.live:
         print("Capturing RealSense frame ...")
         pcd = io.capture_realsense_frame()
@@ -23,11 +66,19 @@ def main() -> None:
         print(f"Loading {args.input} ...")
         pcd = io.load_point_cloud(args.input)
 
-    shape = detect.detect_shape(pcd, verbose=True)
-    print(f"Detected shape: {shape}")
+    result = detect.analyze_shape(pcd, verbose=True)
+    print(f"Detected shape: {result.label} (tier: {result.tier}, "
+          f"{sum(result.timings.values()):.1f} ms)")
+    if result.radius is not None:
+        print(f"  centre {result.centre}, radius {result.radius:.4f}")
+    if result.axis is not None:
+        print(f"  axis {result.axis}")
+    if result.extent is not None:
+        print(f"  extents {result.extent}")
 
     if args.visualize:
-        visualize.show(pcd, shape)
+        from shape_detector import visualize
+        visualize.show(pcd, result.label)
 
 
 if __name__ == "__main__":
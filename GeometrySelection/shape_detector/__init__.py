@@ -1,4 +1,20 @@
 from importlib import import_module
 
-for _mod in ("io", "detect", "ransac", "visualize"):
-    import_module(f".{_mod}", __name__)
+# Sous-modules chargés à la première utilisation (PEP 562) : un client sans
+# affichage (service, batch) ne charge jamais ``visualize``.
+_SUBMODULES = ("io", "batch", "benchmark", "cache", "descriptors", "detect", "fit", "primitives",
+               "ransac", "service", "visualize")
+
+__all__ = list(_SUBMODULES)
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        module = import_module(f".{name}", __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBMODULES))
@@ -0,0 +1,147 @@
+"""
+Évaluation par lots : classification d'un répertoire étiqueté sur un pool
+de processus, matrice de confusion, percentiles de latence, débit, et
+balayage de seuils (chaque tâche lit un nuage une fois et l'évalue pour
+plusieurs combinaisons).
+
+Étiquettes de vérité terrain :
+  • sous-répertoires par classe (``spherical/``, ``cylinder/``, ``box/`` …), ou
+  • ``labels.csv`` (``fichier,classe``) à la racine du répertoire.
+"""
+
+from __future__ import annotations
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+from . import ransac
+from .detect import analyze_shape
+from .io import load_point_cloud
+
+LABELS = ("spherical", "cylindrical", "cuboid/tablet")
+CLOUD_SUFFIXES = (".ply", ".pcd", ".xyz", ".xyzn", ".xyzrgb", ".pts")
+
+_ALIASES = {
+    "sphere": "spherical", "spheres": "spherical", "spherical": "spherical", "ball": "spherical",
+    "cylinder": "cylindrical", "cylinders": "cylindrical", "cylindrical": "cylindrical",
+    "cuboid": "cuboid/tablet", "cuboids": "cuboid/tablet", "tablet": "cuboid/tablet",
+    "box": "cuboid/tablet", "boxes": "cuboid/tablet", "cube": "cuboid/tablet",
+    "cuboid/tablet": "cuboid/tablet",
+}
+
+
+class Prediction(NamedTuple):
+    combo: int              # indice de la combinaison de seuils
+    path: str
+    truth: str
+    label: str
+    tier: str
+    ms: float
+
+
+def canonical_label(name: str) -> str:
+    try:
+        return _ALIASES[name.strip().lower()]
+    except KeyError:
+        raise ValueError(f"Unknown class {name!r}; use one of {sorted(_ALIASES)}") from None
+
+
+def find_labelled(root: Path) -> list[tuple[Path, str]]:
+    """(fichier, classe) de tous les nuages étiquetés sous *root*."""
+    root = Path(root)
+    table = root / "labels.csv"
+    if table.exists():
+        with open(table, newline="") as f:
+            rows = [r for r in csv.reader(f) if r and not r[0].startswith("#")]
+        return [(root / name, canonical_label(label)) for name, label in rows]
+    items = []
+    for p in sorted(root.rglob("*")):
+        if p.suffix.lower() in CLOUD_SUFFIXES and p.parent != root:
+            items.append((p, canonical_label(p.relative_to(root).parts[0])))
+    if not items:
+        raise ValueError(f"No labelled clouds in {root}: add class sub-directories or a labels.csv")
+    return items
+
+
+def sweep_grid(sweep: dict[str, list[float]] | None) -> list[dict]:
+    """Produit cartésien ``{'iso_thr': [0.1, 0.2]}`` → ``[{'iso_thr': 0.1}, {'iso_thr': 0.2}]``."""
+    if not sweep:
+        return [{}]
+    keys = list(sweep)
+    return [dict(zip(keys, values)) for values in itertools.product(*(sweep[k] for k in keys))]
+
+
+# --------------------------------------------------------------------------- #
+def _single_threaded() -> None:
+    """Initialiseur du pool : un processus par cœur, donc pas de threads RANSAC en plus."""
+    ransac.DEFAULT_WORKERS = 1
+
+
+def _classify_file(path: str, truth: str, combos: list[tuple[int, dict]]) -> list[Prediction]:
+    pcd = load_point_cloud(Path(path))
+    out = []
+    for i, thresholds in combos:
+        t0 = time.perf_counter()
+        res = analyze_shape(pcd, thresholds=thresholds)
+        out.append(Prediction(i, path, truth, res.label, res.tier, 1e3 * (time.perf_counter() - t0)))
+    return out
+
+
+def run_batch(root: Path,
+              sweep: dict[str, list[float]] | None = None,
+              workers: int | None = None) -> tuple[list[dict], list[Prediction], float]:
+    """Classe tout *root* pour chaque combinaison de seuils ; renvoie (combos, prédictions, durée s)."""
+    items = find_labelled(root)
+    combos = sweep_grid(sweep)
+    workers = workers or os.cpu_count() or 1
+    # peu de fichiers mais beaucoup de combinaisons : on découpe aussi le balayage
+    chunks = max(1, min(len(combos), -(-workers // len(items))))
+    indexed = list(enumerate(combos))
+    jobs = [(str(p), y, indexed[c::chunks]) for p, y in items for c in range(chunks)]
+    t0 = time.perf_counter()
+    if workers == 1:
+        results = [_classify_file(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)),
+                                 initializer=_single_threaded) as pool:
+            results = list(pool.map(_classify_file, *zip(*jobs)))
+    return combos, [p for r in results for p in r], time.perf_counter() - t0
+
+
+def confusion_matrix(preds: list[Prediction]) -> np.ndarray:
+    """Matrice (vérité × prédiction) dans l'ordre de :data:`LABELS`."""
+    m = np.zeros((len(LABELS), len(LABELS)), dtype=int)
+    for p in preds:
+        m[LABELS.index(p.truth), LABELS.index(p.label)] += 1
+    return m
+
+
+def report(combos: list[dict], preds: list[Prediction], elapsed: float) -> str:
+    lines = []
+    files = len({p.path for p in preds})
+    for i, combo in enumerate(combos):
+        sub = [p for p in preds if p.combo == i]
+        m = confusion_matrix(sub)
+        ms = np.array([p.ms for p in sub])
+        acc = np.trace(m) / max(m.sum(), 1)
+        head = ", ".join(f"{k}={v}" for k, v in combo.items()) or "default thresholds"
+        lines.append(f"== {head}: accuracy {acc:.1%} ({np.trace(m)}/{m.sum()})")
+        width = max(len(lbl) for lbl in LABELS)
+        lines.append(" " * (width + 2) + "  ".join(f"{lbl[:9]:>9}" for lbl in LABELS))
+        for lbl, row in zip(LABELS, m):
+            lines.append(f"{lbl:>{width}}  " + "  ".join(f"{v:9d}" for v in row))
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        tiers = ", ".join(f"{t} {sum(p.tier == t for p in sub)}" for t in sorted({p.tier for p in sub}))
+        lines.append(f"latency per file: p50 {p50:.1f} ms, p95 {p95:.1f} ms, p99 {p99:.1f} ms; tiers: {tiers}")
+        for p in sub:
+            if p.label != p.truth:
+                lines.append(f"  miss: {p.path} ({p.truth} -> {p.label})")
+    lines.append(f"{files} file(s) x {len(combos)} setting(s) in {elapsed:.2f} s: "
+                 f"{len(preds) / elapsed:.1f} classifications/s")
+    return "\n".join(lines)
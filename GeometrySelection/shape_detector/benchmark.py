@@ -0,0 +1,344 @@
+"""
+Banc d'essai synthétique : précision et latence de ``detect_shape``,
+``fit_sphere`` et ``fit_cylinder`` sur des sphères, cylindres et boîtes générés.
+
+Chaque nuage est tiré avec une taille, une orientation et une position
+aléatoires, puis dégradé comme par une caméra de profondeur :
+  • vue unique (``single``) : seules les faces tournées vers la caméra restent
+  • bruit gaussien le long du rayon de vue (isotrope pour la vue ``full``)
+  • part de points aberrants uniformes dans la boîte englobante élargie
+
+Les courbes (précision, latence médiane / p95 en fonction du nombre de
+points) sont calculées pour chaque méthode et chaque condition ; ``--compare``
+signale toute baisse de précision par rapport à une référence JSON, ce qui
+sert de garde-fou pour les optimisations de ``ransac.py`` :
+
+    python -m shape_detector.benchmark --out bench.json
+    python -m shape_detector.benchmark --compare bench.json      # après une modification
+"""
+
+from __future__ import annotations
+import argparse
+import itertools
+import json
+import platform
+import subprocess
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import open3d as o3d
+
+from .batch import canonical_label
+from .detect import detect_shape
+from .ransac import fit_sphere, fit_cylinder
+
+__all__ = ["KINDS", "METHODS", "VIEWS", "Synthetic", "synthesize", "run", "report", "compare"]
+
+KINDS = ("sphere", "cylinder", "box")
+VIEWS = ("full", "single")
+_REDRAWS = 20           # points de vue essayés avant d'accepter une vue plane
+_FLAT = 1e-3            # plus petite / plus grande valeur singulière d'un nuage plan
+# méthode -> formes sur lesquelles elle est évaluée
+METHODS = {
+    "detect_shape": KINDS,
+    "fit_sphere": ("sphere",),
+    "fit_cylinder": ("cylinder",),
+    "fit_cylinder+normals": ("cylinder",),
+}
+
+
+class Synthetic(NamedTuple):
+    """Nuage généré et sa vérité terrain."""
+    kind: str                           # 'sphere', 'cylinder' ou 'box'
+    points: np.ndarray                  # (N, 3)
+    normals: np.ndarray                 # (N, 3) normales vraies (aberrants : aléatoires)
+    centre: np.ndarray                  # centre sphère / point de l'axe / centre boîte
+    radius: float | None = None         # sphère, cylindre
+    axis: np.ndarray | None = None      # cylindre
+    extent: np.ndarray | None = None    # boîte : dimensions triées
+
+
+# --------------------------------------------------------------------------- #
+#  G É N É R A T I O N                                                        #
+# --------------------------------------------------------------------------- #
+def _rotation(rng: np.random.Generator) -> np.ndarray:
+    q, r = np.linalg.qr(rng.normal(size=(3, 3)))
+    q = q * np.sign(np.diag(r))
+    return q if np.linalg.det(q) > 0 else -q
+
+
+def _surface(kind: str, m: int, dims: np.ndarray,
+             rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+    """*m* points uniformes sur la surface (repère objet centré) et leurs normales."""
+    if kind == "sphere":
+        n = rng.normal(size=(m, 3))
+        n /= np.linalg.norm(n, axis=1, keepdims=True)
+        return dims[0] * n, n
+    if kind == "cylinder":
+        r, h = dims
+        lateral = rng.random(m) < h / (h + r)             # aires : 2πrh contre 2πr²
+        a = rng.uniform(0, 2 * np.pi, m)
+        rho = np.where(lateral, r, r * np.sqrt(rng.random(m)))
+        z = np.where(lateral, rng.uniform(-h / 2, h / 2, m), np.where(rng.random(m) < 0.5, -h / 2, h / 2))
+        p = np.c_[rho * np.cos(a), rho * np.sin(a), z]
+        n = np.where(lateral[:, None], np.c_[np.cos(a), np.sin(a), np.zeros(m)],
+                     np.c_[np.zeros((m, 2)), np.sign(z)])
+        return p, n
+    half = dims / 2
+    areas = np.array([dims[1] * dims[2], dims[0] * dims[2], dims[0] * dims[1]])
+    face = rng.choice(3, m, p=areas / areas.sum())
+    sign = np.where(rng.random(m) < 0.5, -1.0, 1.0)
+    p = rng.uniform(-half, half, (m, 3))
+    p[np.arange(m), face] = sign * half[face]
+    n = np.zeros((m, 3))
+    n[np.arange(m), face] = sign
+    return p, n
+
+
+def synthesize(kind: str,
+               n: int = 5000,
+               size: float = 0.05,
+               view: str = "single",
+               noise: float = 0.0,
+               outliers: float = 0.0,
+               seed: int | None = None) -> Synthetic:
+    """
+    Nuage de *n* points d'une forme *kind* orientée au hasard.
+      - size     : rayon (sphère, cylindre) ou demi-arête moyenne (boîte), en mètres ;
+                   hauteur de cylindre et proportions de boîte tirées au hasard
+      - view     : 'full' (toute la surface) ou 'single' (faces visibles d'une caméra)
+      - noise    : écart-type du bruit (mètres)
+      - outliers : part des *n* points remplacés par des aberrants uniformes
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind {kind!r}; expected one of {KINDS}")
+    if view not in VIEWS:
+        raise ValueError(f"Unknown view {view!r}; expected one of {VIEWS}")
+    rng = np.random.default_rng(seed)
+    if kind == "sphere":
+        dims = np.array([size])
+    elif kind == "cylinder":
+        dims = np.array([size, size * rng.uniform(2.5, 6.0)])
+    else:
+        dims = 2 * size * rng.uniform(0.4, 1.6, 3)
+
+    rot = _rotation(rng)
+    centre = rng.uniform(-0.3, 0.3, 3) + [0.0, 0.0, 0.8]
+    m_out = int(round(outliers * n))
+    m_surf = n - m_out
+
+    for _ in range(_REDRAWS):
+        cam = centre + 10 * size * _rotation(rng)[:, 0]      # direction de vue aléatoire
+        pts, nrm, got = [], [], 0
+        while got < m_surf:                                   # vue unique : tirage par rejet
+            p, nr = _surface(kind, 2 * m_surf, dims, rng)
+            p, nr = p @ rot.T + centre, nr @ rot.T
+            if view == "single":
+                keep = ((cam - p) * nr).sum(axis=1) > 0       # forme convexe : face vers la caméra
+                p, nr = p[keep], nr[keep]
+            pts.append(p)
+            nrm.append(nr)
+            got += len(p)
+        pts, nrm = np.concatenate(pts)[:m_surf], np.concatenate(nrm)[:m_surf]
+        # une seule face visible (boîte de face, cylindre par le bout) : nuage plan,
+        # que l'enveloppe convexe (qhull) refuse ; on change de point de vue
+        sv = np.linalg.svd(pts - pts.mean(axis=0), compute_uv=False)
+        if sv[2] > _FLAT * sv[0]:
+            break
+
+    if noise > 0:
+        if view == "single":
+            ray = pts - cam
+            ray /= np.linalg.norm(ray, axis=1, keepdims=True)
+            pts = pts + rng.normal(0, noise, (m_surf, 1)) * ray
+        else:
+            pts = pts + rng.normal(0, noise, (m_surf, 3))
+    if m_out:
+        lo, hi = pts.min(axis=0), pts.max(axis=0)
+        pad = 0.2 * (hi - lo)
+        junk = rng.normal(size=(m_out, 3))
+        pts = np.concatenate([pts, rng.uniform(lo - pad, hi + pad, (m_out, 3))])
+        nrm = np.concatenate([nrm, junk / np.linalg.norm(junk, axis=1, keepdims=True)])
+    order = rng.permutation(n)
+
+    if kind == "sphere":
+        return Synthetic(kind, pts[order], nrm[order], centre, radius=float(size))
+    if kind == "cylinder":
+        return Synthetic(kind, pts[order], nrm[order], centre, radius=float(size), axis=rot[:, 2])
+    return Synthetic(kind, pts[order], nrm[order], centre, extent=np.sort(dims))
+
+
+# --------------------------------------------------------------------------- #
+#  É V A L U A T I O N                                                        #
+# --------------------------------------------------------------------------- #
+def _evaluate(method: str, s: Synthetic, noise: float, tol: float, seed: int) -> tuple[bool, float, bool]:
+    """(succès, durée ms, exception) ; une exception (nuage dégénéré) compte comme un échec."""
+    t0 = time.perf_counter()
+    try:
+        return (*_call(method, s, noise, tol, seed), False)
+    except Exception:
+        return False, 1e3 * (time.perf_counter() - t0), True
+
+
+def _call(method: str, s: Synthetic, noise: float, tol: float, seed: int) -> tuple[bool, float]:
+    """(succès, durée ms) d'un appel ; tolérance RANSAC = 3 % du rayon + 2 σ de bruit."""
+    if method == "detect_shape":
+        pcd = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(s.points))
+        t0 = time.perf_counter()
+        label = detect_shape(pcd)
+        return label == canonical_label(s.kind), 1e3 * (time.perf_counter() - t0)
+
+    thr = 0.03 * s.radius + 2 * noise
+    t0 = time.perf_counter()
+    if method == "fit_sphere":
+        c, r, _ = fit_sphere(s.points, thr=thr, seed=seed)
+        ms = 1e3 * (time.perf_counter() - t0)
+        ok = c is not None and abs(r - s.radius) <= tol * s.radius \
+            and np.linalg.norm(c - s.centre) <= tol * s.radius
+        return bool(ok), ms
+
+    normals = s.normals if method == "fit_cylinder+normals" else None
+    p, a, r, _ = fit_cylinder(s.points, thr=thr, normals=normals, seed=seed)
+    ms = 1e3 * (time.perf_counter() - t0)
+    if p is None:
+        return False, ms
+    off = (p - s.centre) - ((p - s.centre) @ s.axis) * s.axis   # écart du point à l'axe vrai
+    ok = abs(r - s.radius) <= tol * s.radius and abs(a @ s.axis) >= np.cos(np.radians(5.0)) \
+        and np.linalg.norm(off) <= tol * s.radius
+    return bool(ok), ms
+
+
+def run(points: list[int] = (1000, 5000, 20000),
+        views: list[str] = VIEWS,
+        noise: list[float] = (0.0, 0.001),
+        outliers: list[float] = (0.0, 0.05),
+        methods: list[str] = tuple(METHODS),
+        size: float = 0.05,
+        trials: int = 5,
+        tol: float = 0.05,
+        seed: int = 0,
+        verbose: bool = True) -> dict:
+    """
+    Toutes les combinaisons (points × vue × bruit × aberrants) pour chaque
+    méthode et chaque forme qu'elle traite, *trials* nuages par combinaison
+    (les mêmes pour toutes les méthodes). Un ajustement réussit si rayon et
+    centre sont à *tol* (relatif au rayon) près, et l'axe à 5° près.
+    """
+    unknown = set(methods) - set(METHODS)
+    if unknown:
+        raise ValueError(f"Unknown method(s) {sorted(unknown)}; expected a subset of {list(METHODS)}")
+    results = []
+    for n, view, sigma, out in itertools.product(points, views, noise, outliers):
+        for kind in KINDS:
+            todo = [m for m in methods if kind in METHODS[m]]
+            if not todo:
+                continue
+            clouds = [synthesize(kind, n, size, view, sigma, out, seed=seed + t) for t in range(trials)]
+            for method in todo:
+                runs = [_evaluate(method, s, sigma, tol, seed + t) for t, s in enumerate(clouds)]
+                ms = np.array([r[1] for r in runs])
+                row = dict(method=method, kind=kind, points=n, view=view, noise=sigma, outliers=out,
+                           trials=trials, accuracy=float(np.mean([r[0] for r in runs])),
+                           errors=int(sum(r[2] for r in runs)),
+                           ms_median=float(np.median(ms)), ms_p95=float(np.percentile(ms, 95)))
+                results.append(row)
+                if verbose:
+                    print(f"{method:<21} {kind:<9} {n:>7} {view:<6} noise {sigma:<6g} outliers {out:<5g}"
+                          f" acc {row['accuracy']:6.1%}  {row['ms_median']:8.1f} ms"
+                          + (f"  ({row['errors']} error(s))" if row["errors"] else ""))
+    return {"meta": _meta(size, trials, tol, seed), "results": results}
+
+
+def _meta(size: float, trials: int, tol: float, seed: int) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=Path(__file__).parent).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"commit": commit, "size": size, "trials": trials, "tol": tol, "seed": seed,
+            "python": platform.python_version(), "numpy": np.__version__,
+            "open3d": o3d.__version__, "machine": platform.machine(), "platform": platform.platform()}
+
+
+def _condition(r: dict) -> tuple:
+    return r["method"], r["kind"], r["view"], r["noise"], r["outliers"]
+
+
+def report(res: dict) -> str:
+    """Une courbe par méthode et condition : précision / latence médiane selon le nombre de points."""
+    rows = res["results"]
+    sizes = sorted({r["points"] for r in rows})
+    lines = []
+    for method in dict.fromkeys(r["method"] for r in rows):
+        lines.append(f"== {method}  (accuracy / median ms per point count)")
+        lines.append(f"{'kind':<9} {'view':<6} {'noise':>6} {'outl.':>5}  "
+                     + "  ".join(f"{n:>15}" for n in sizes))
+        curves: dict[tuple, dict] = {}
+        for r in rows:
+            if r["method"] == method:
+                curves.setdefault(_condition(r), {})[r["points"]] = r
+        for (_, kind, view, sigma, out), by_n in curves.items():
+            cells = [f"{by_n[n]['accuracy']:5.0%} {by_n[n]['ms_median']:7.1f} ms" if n in by_n else " " * 15
+                     for n in sizes]
+            lines.append(f"{kind:<9} {view:<6} {sigma:>6g} {out:>5g}  " + "  ".join(cells))
+        sub = [r for r in rows if r["method"] == method]
+        acc = np.mean([r["accuracy"] for r in sub])
+        errors = sum(r.get("errors", 0) for r in sub)
+        lines.append(f"overall accuracy {acc:.1%} ({errors} call(s) raised), median latency "
+                     + ", ".join(f"{n} pts {np.median([r['ms_median'] for r in sub if r['points'] == n]):.1f} ms"
+                                 for n in sizes))
+    return "\n".join(lines)
+
+
+def compare(baseline: dict, current: dict, acc_tol: float = 0.05) -> list[str]:
+    """Écart à une référence ; une précision en baisse de plus de *acc_tol* est une REGRESSION."""
+    base = {(*_condition(r), r["points"]): r for r in baseline["results"]}
+    lines, bad = [], 0
+    for r in current["results"]:
+        b = base.get((*_condition(r), r["points"]))
+        if b is None:
+            continue
+        speed = b["ms_median"] / r["ms_median"] if r["ms_median"] else float("inf")
+        flag = ""
+        if r["accuracy"] < b["accuracy"] - acc_tol:
+            flag, bad = f"  REGRESSION: accuracy {b['accuracy']:.0%} -> {r['accuracy']:.0%}", bad + 1
+        lines.append(f"{r['method']:<21} {r['kind']:<9} {r['points']:>7} {r['view']:<6} "
+                     f"noise {r['noise']:<6g} outliers {r['outliers']:<5g} "
+                     f"{b['ms_median']:8.1f} -> {r['ms_median']:8.1f} ms (x{speed:.2f}){flag}")
+    lines.append(f"{bad} accuracy regression(s)")
+    return lines
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Accuracy / latency benchmark on synthetic primitives")
+    ap.add_argument("--points", type=int, nargs="+", default=[1000, 5000, 20000])
+    ap.add_argument("--views", nargs="+", default=list(VIEWS), choices=VIEWS)
+    ap.add_argument("--noise", type=float, nargs="+", default=[0.0, 0.001], help="Noise sigma (m)")
+    ap.add_argument("--outliers", type=float, nargs="+", default=[0.0, 0.05], help="Outlier fraction")
+    ap.add_argument("--methods", nargs="+", default=list(METHODS), choices=list(METHODS))
+    ap.add_argument("--size", type=float, default=0.05, help="Object radius / half edge (m)")
+    ap.add_argument("--trials", type=int, default=5, help="Clouds per condition")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", "-o", help="Write results as JSON")
+    ap.add_argument("--compare", help="Baseline JSON to compare against")
+    args = ap.parse_args()
+
+    res = run(args.points, args.views, args.noise, args.outliers, args.methods,
+              args.size, args.trials, seed=args.seed)
+    print(report(res))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(res, f, indent=2)
+        print(f"Saved results to {args.out}")
+    if args.compare:
+        with open(args.compare) as f:
+            lines = compare(json.load(f), res)
+        print("\n".join(lines))
+        if not lines[-1].startswith("0 "):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Cache de résultats pour la détection en direct sur des trames successives.
+
+Chaque objet suivi garde une empreinte bon marché de son nuage (centroïde,
+dimensions dans le repère ACP, nombre de points, occupation d'une grille
+grossière). Tant que l'empreinte d'une nouvelle trame reste dans les
+tolérances, le résultat précédent (classe + paramètres ajustés) est réutilisé
+sans relancer la cascade. Un vote majoritaire sur les *window* dernières
+décisions donne une étiquette stable au contrôleur de préhension.
+"""
+
+from __future__ import annotations
+import time
+from collections import Counter, deque
+from typing import NamedTuple
+
+import numpy as np
+import open3d as o3d
+
+from .detect import ShapeResult, analyze_shape
+
+__all__ = ["Fingerprint", "fingerprint", "ShapeCache"]
+
+
+class Fingerprint(NamedTuple):
+    centroid: np.ndarray
+    extent: np.ndarray          # dimensions triées dans le repère ACP (≈ OBB)
+    count: int
+    cell: float                 # pas de la grille d'occupation
+    cells: np.ndarray           # cellules occupées (triées), grille centrée sur le centroïde
+
+
+def fingerprint(pcd: o3d.geometry.PointCloud,
+                cell: float | None = None,
+                grid: int = 8,
+                sample: int = 4096,
+                seed: int = 0) -> Fingerprint:
+    """
+    Empreinte en O(échantillon) : ni voxelisation complète ni OBB Open3D.
+    Sans *cell*, la grille fait *grid* cellules sur la plus grande dimension.
+    """
+    pts = np.asarray(pcd.points)
+    count = len(pts)
+    if count > sample:
+        pts = pts[np.random.default_rng(seed).choice(count, sample, replace=False)]
+    centroid = pts.mean(axis=0)
+    x = pts - centroid
+    _, vecs = np.linalg.eigh(x.T @ x)
+    proj = x @ vecs
+    extent = np.sort(proj.max(axis=0) - proj.min(axis=0))
+    cell = cell or max(float(extent[-1]) / grid, 1e-6)
+    ijk = np.floor(x / cell).astype(np.int64) + (1 << 20)
+    cells = np.unique((ijk[:, 0] << 42) | (ijk[:, 1] << 21) | ijk[:, 2])
+    return Fingerprint(centroid, extent, count, cell, cells)
+
+
+class _Entry:
+    def __init__(self, fp: Fingerprint, result: ShapeResult, window: int):
+        self.fp = fp
+        self.labels: deque[str] = deque(maxlen=window)
+        self.by_label: dict[str, ShapeResult] = {}
+        self.record(fp, result)
+
+    def record(self, fp: Fingerprint, result: ShapeResult) -> None:
+        self.fp = fp
+        self.labels.append(result.label)
+        self.by_label[result.label] = result
+
+    def vote(self) -> str:
+        counts = Counter(self.labels)
+        best = max(counts.values())
+        # égalité : la décision la plus récente l'emporte
+        return next(lbl for lbl in reversed(self.labels) if counts[lbl] == best)
+
+
+class ShapeCache:
+    """
+    Classification avec réutilisation et vote temporel, par objet.
+
+      - window        : nombre de décisions pour le vote majoritaire
+      - move_tol      : déplacement max du centroïde (m) pour réutiliser
+      - extent_tol    : variation relative max des dimensions
+      - count_tol     : variation relative max du nombre de points
+      - overlap_tol   : recouvrement (Jaccard) min des grilles d'occupation
+      - match_dist    : au‑delà, une empreinte est un nouvel objet
+      - max_objects   : objets suivis (le moins récent est oublié)
+      - grid          : cellules de la grille d'occupation sur la plus grande dimension
+    """
+    def __init__(self,
+                 window: int = 5,
+                 move_tol: float = 0.01,
+                 extent_tol: float = 0.10,
+                 count_tol: float = 0.25,
+                 overlap_tol: float = 0.6,
+                 match_dist: float = 0.10,
+                 max_objects: int = 8,
+                 grid: int = 8,
+                 thresholds: dict | None = None):
+        self.window = window
+        self.move_tol, self.extent_tol, self.count_tol = move_tol, extent_tol, count_tol
+        self.overlap_tol, self.match_dist = overlap_tol, match_dist
+        self.max_objects, self.grid = max_objects, grid
+        self.thresholds = thresholds
+        self.objects: list[_Entry] = []
+        self.hits = self.misses = 0
+
+    def reset(self) -> None:
+        self.objects.clear()
+
+    # ------------------------------------------------------------------ #
+    def _match(self, fp: Fingerprint) -> _Entry | None:
+        if not self.objects:
+            return None
+        dist = [np.linalg.norm(e.fp.centroid - fp.centroid) for e in self.objects]
+        i = int(np.argmin(dist))
+        return self.objects[i] if dist[i] <= self.match_dist else None
+
+    def _unchanged(self, old: Fingerprint, new: Fingerprint) -> bool:
+        if np.linalg.norm(old.centroid - new.centroid) > self.move_tol:
+            return False
+        if np.any(np.abs(new.extent - old.extent) > self.extent_tol * np.maximum(old.extent, 1e-9)):
+            return False
+        if abs(new.count - old.count) > self.count_tol * max(old.count, 1):
+            return False
+        inter = len(np.intersect1d(old.cells, new.cells, assume_unique=True))
+        union = len(old.cells) + len(new.cells) - inter
+        return inter / max(union, 1) >= self.overlap_tol
+
+    def classify(self, pcd: o3d.geometry.PointCloud, verbose: bool = False) -> ShapeResult:
+        """Résultat de l'objet *pcd* : mis en cache si inchangé, étiquette issue du vote."""
+        t0 = time.perf_counter()
+        fp = fingerprint(pcd, grid=self.grid)
+        entry = self._match(fp)
+        if entry is not None:                        # même grille que la référence
+            fp = fingerprint(pcd, cell=entry.fp.cell)
+        if entry is not None and self._unchanged(entry.fp, fp):
+            # l'empreinte de référence reste celle de la dernière classification :
+            # une dérive lente finit donc par dépasser les tolérances
+            self.hits += 1
+            self.objects.remove(entry)
+            self.objects.append(entry)               # le plus récent en fin de liste
+            entry.labels.append(entry.labels[-1])   # la décision précédente compte encore
+            label = entry.vote()
+            res = entry.by_label[label]
+            return res._replace(tier="cache", timings={"cache": 1e3 * (time.perf_counter() - t0)})
+
+        self.misses += 1
+        res = analyze_shape(pcd, verbose, self.thresholds)
+        if entry is None:
+            entry = _Entry(fp, res, self.window)
+            self.objects.append(entry)
+            if len(self.objects) > self.max_objects:
+                self.objects.pop(0)
+        else:
+            entry.record(fp, res)
+            self.objects.remove(entry)
+            self.objects.append(entry)               # le plus récent en fin de liste
+        label = entry.vote()
+        if label != res.label:                       # décision isolée : on garde l'étiquette stable
+            res = entry.by_label[label]._replace(tier=res.tier, timings=res.timings)
+        return res
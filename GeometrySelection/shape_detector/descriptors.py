@@ -0,0 +1,94 @@
+"""
+Descripteurs de forme bon marché (premier étage de la cascade de detect.py) :
+  • valeurs propres ACP des points
+  • dimensions de l'OBB
+  • statistiques des normales (directions dominantes, radialité, axe commun)
+
+Les normales sont celles du nuage si présentes (pipeline Filtering), sinon
+estimées seulement sur un sous-échantillon de points.
+"""
+
+from __future__ import annotations
+from typing import NamedTuple
+import numpy as np
+import open3d as o3d
+
+__all__ = ["Descriptors", "compute_descriptors"]
+
+
+class Descriptors(NamedTuple):
+    extent: np.ndarray          # dimensions OBB triées (e1 ≤ e2 ≤ e3)
+    eig_ratio: np.ndarray       # valeurs propres ACP / la plus grande (λ1 ≤ λ2 ≤ 1)
+    boxiness: float             # part des normales portées par 3 directions dominantes (±11°)
+    radiality: float            # |n · (x - centroïde)| moyen normalisé (≈ 1 : sphère pleine)
+    normal_axis: np.ndarray     # direction la moins représentée dans les normales
+    normal_axis_share: float    # sa part de la dispersion des normales (≈ 0 : cylindre sans fonds)
+    centroid: np.ndarray
+
+
+def _sample_normals(points: np.ndarray, m: int, k: int, rng: np.random.Generator,
+                    support: int = 8192) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Normales ACP de *m* points tirés au hasard ; leurs *k* plus proches
+    voisins sont cherchés parmi au plus *support* points (index rapide).
+    """
+    if len(points) > support:
+        points = points[rng.choice(len(points), support, replace=False)]
+    sub = points[:m] if len(points) > m else points   # déjà mélangés si sous-échantillonnés
+    if len(points) <= support and len(points) > m:
+        sub = points[rng.choice(len(points), m, replace=False)]
+    nns = o3d.core.nns.NearestNeighborSearch(o3d.core.Tensor.from_numpy(
+        np.ascontiguousarray(points, dtype=np.float32)))
+    nns.knn_index()
+    idx, _ = nns.knn_search(o3d.core.Tensor.from_numpy(np.ascontiguousarray(sub, dtype=np.float32)),
+                            min(k, len(points)))
+    nb = points[idx.numpy()]                                   # (m, k, 3)
+    nb = nb - nb.mean(axis=1, keepdims=True)
+    _, vecs = np.linalg.eigh(np.einsum("mki,mkj->mij", nb, nb))
+    return sub, vecs[:, :, 0]                                  # plus petite valeur propre
+
+
+def _boxiness(normals: np.ndarray, cos_tol: float = 0.98, faces: int = 3) -> float:
+    """
+    Part des normales couvertes par *faces* directions dominantes (au signe
+    près) : ≈ 1 pour une boîte quelle que soit son orientation, faible pour
+    une sphère (~0.06) ou la paroi d'un cylindre (~0.35).
+    """
+    aligned = np.abs(normals @ normals.T) > cos_tol
+    left = np.ones(len(normals), dtype=bool)
+    for _ in range(faces):
+        counts = (aligned & left).sum(axis=1)
+        counts[~left] = 0
+        i = int(counts.argmax())
+        if counts[i] == 0:
+            break
+        left &= ~aligned[i]
+    return float(1.0 - left.mean())
+
+
+def compute_descriptors(pcd: o3d.geometry.PointCloud,
+                        obb: o3d.geometry.OrientedBoundingBox,
+                        sample: int = 512,
+                        k: int = 16,
+                        seed: int | None = 0) -> Descriptors:
+    pts = np.asarray(pcd.points)
+    centroid = pts.mean(axis=0)
+    x = pts - centroid
+    lam = np.linalg.eigvalsh(x.T @ x / len(x))
+    eig_ratio = lam / max(lam[-1], 1e-12)
+
+    rng = np.random.default_rng(seed)
+    if pcd.has_normals():
+        sel = rng.choice(len(pts), min(sample, len(pts)), replace=False)
+        sub, nrm = pts[sel], np.asarray(pcd.normals)[sel]
+        nrm = nrm / np.maximum(np.linalg.norm(nrm, axis=1, keepdims=True), 1e-12)
+    else:
+        sub, nrm = _sample_normals(pts, sample, k, rng)
+
+    boxiness = _boxiness(nrm)
+    radial = sub - centroid
+    radial /= np.maximum(np.linalg.norm(radial, axis=1, keepdims=True), 1e-12)
+    radiality = float(np.mean(np.abs((nrm * radial).sum(axis=1))))
+    s_val, s_vec = np.linalg.eigh(nrm.T @ nrm / len(nrm))
+    return Descriptors(np.sort(np.asarray(obb.extent)), eig_ratio, boxiness, radiality,
+                       s_vec[:, 0], float(s_val[0]), centroid)
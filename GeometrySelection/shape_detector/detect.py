@@ -2,11 +2,56 @@
 Détection : sphère / cylindre / cuboïde-tablette
 """
 from __future__ import annotations
+import time
+from typing import NamedTuple
 import numpy as np
 import open3d as o3d
+from .descriptors import compute_descriptors
+from .fit import fit_sphere_lsq, fit_cylinder_lsq, fit_circle_on_axis
 from .ransac import fit_sphere, fit_cylinder
 
 
+class ShapeResult(NamedTuple):
+    """Forme détectée, paramètres ajustés (pour dimensionner la prise) et coût de la cascade."""
+    label: str                          # 'spherical', 'cylindrical' ou 'cuboid/tablet'
+    centre: np.ndarray                  # centre sphère / point de l'axe / centre OBB
+    radius: float | None = None         # sphère, cylindre
+    axis: np.ndarray | None = None      # cylindre
+    extent: np.ndarray | None = None    # dimensions OBB triées (e1 ≤ e2 ≤ e3)
+    inlier_ratio: float = 0.0
+    tier: str = "obb"                   # étage qui a décidé : TIERS
+    timings: dict | None = None         # étage -> durée (ms), renseigné par analyze_shape
+
+
+TIERS = ("obb", "descriptors", "lsq", "ransac", "cache")  # cache : voir cache.ShapeCache
+
+# Seuils de la cascade (surchargeables via ``analyze_shape(..., thresholds=)``)
+THRESHOLDS = {
+    "iso_thr": 0.15,          # sphère : axes OBB ≈ ±15 %
+    "cyl_thr": 0.15,          # cylindre : rayonX ≈ rayonY ±15 %
+    "length_ratio": 1.15,     # cylindre : hauteur ≥ 1.15 × rayon
+    "box_thr": 0.75,          # normales portées par ≤ 3 directions → boîte
+    "radial_thr": 0.97,       # normales radiales → sphère pleine
+    "eig_thr": 0.8,           # … et points répartis dans les 3 axes (ACP)
+    "axis_share_thr": 0.02,   # normales ⟂ à un axe commun → paroi de cylindre
+    "lsq_ratio": 0.90,        # ajustement fermé : ≥ 90 % de résidus sous le seuil
+    "sphere_ratio": 0.70,     # RANSAC sphère : ratio d'inliers minimal
+    "cylinder_ratio": 0.25,   # RANSAC cylindre : ratio d'inliers minimal
+}
+
+
+class _Clock:
+    """Chronomètre cumulatif par étage."""
+    def __init__(self):
+        self.timings: dict[str, float] = {}
+        self._t = time.perf_counter()
+
+    def lap(self, tier: str) -> None:
+        now = time.perf_counter()
+        self.timings[tier] = self.timings.get(tier, 0.0) + 1e3 * (now - self._t)
+        self._t = now
+
+
 # --------------------------------------------------------------------------- #
 def _down(pc, vox=0.005):
     return pc.voxel_down_sample(vox)
@@ -17,31 +62,92 @@ def _obb(pc):
 
 
 # --------------------------------------------------------------------------- #
-def detect_shape(pcd: o3d.geometry.PointCloud, verbose: bool = False) -> str:
-    """Retourne 'spherical', 'cylindrical' ou 'cuboid/tablet'."""
+def analyze_shape(pcd: o3d.geometry.PointCloud,
+                  verbose: bool = False,
+                  thresholds: dict | None = None) -> ShapeResult:
+    """
+    Comme :func:`detect_shape`, mais renvoie aussi les paramètres ajustés.
+    *thresholds* remplace tout ou partie de :data:`THRESHOLDS`.
+
+    Cascade à sortie anticipée, du moins cher au plus cher :
+      1. obb         : dimensions seules (ni sphère ni cylindre plausibles → cuboïde)
+      2. descriptors : ACP + statistiques des normales, décision si sans ambiguïté
+      3. lsq         : ajustements fermés, acceptés si les résidus sont serrés
+      4. ransac      : nuages bruités / partiels
+    """
+    unknown = set(thresholds or {}) - set(THRESHOLDS)
+    if unknown:
+        raise ValueError(f"Unknown threshold(s) {sorted(unknown)}; expected a subset of {list(THRESHOLDS)}")
+    t = {**THRESHOLDS, **(thresholds or {})}
+    clock = _Clock()
+
+    def done(label, centre, tier, **kw) -> ShapeResult:
+        clock.lap(tier)
+        res = ShapeResult(label, centre, tier=tier, timings=clock.timings, **kw)
+        if verbose:
+            print(f"Decided by {tier}: " + ", ".join(f"{k} {v:.1f} ms" for k, v in clock.timings.items()))
+        return res
+
+    # ---------- 1. OBB --------------------------------------------------------
     pcd_d = _down(pcd)
+    pts = np.asarray(pcd_d.points)
     obb = _obb(pcd_d)
     ext = np.asarray(obb.extent)          # (lx, ly, lz)
     e1, e2, e3 = np.sort(ext)             # e1 ≤ e2 ≤ e3
     if verbose:
         print(f"Extents: {ext}")
 
-    # ---------- Sphère ------------------------------------------------------
-    iso_thr = 0.15                       # axes ≈ ±15 %
-    if np.allclose(ext, ext.mean(), rtol=iso_thr):
-        thr_s = 0.015 * ext.mean()       # 1.5 % du diamètre
-        _, _, inl = fit_sphere(np.asarray(pcd_d.points), thr=thr_s)
+    is_iso = np.allclose(ext, ext.mean(), rtol=t["iso_thr"])
+    radius_est = (e1 + e2) / 2
+    looks_cyl = abs(e1 - e2) < t["cyl_thr"] * radius_est and e3 > t["length_ratio"] * radius_est
+    if not (is_iso or looks_cyl):
+        return done("cuboid/tablet", np.asarray(obb.center), "obb", extent=np.array([e1, e2, e3]))
+    clock.lap("obb")
+
+    # ---------- 2. Descripteurs ----------------------------------------------
+    desc = compute_descriptors(pcd_d, obb)
+    if verbose:
+        print(f"Descriptors: boxiness {desc.boxiness:.2f}, radiality {desc.radiality:.2f}, "
+              f"normal axis share {desc.normal_axis_share:.3f}")
+    if desc.boxiness >= t["box_thr"]:
+        return done("cuboid/tablet", np.asarray(obb.center), "descriptors",
+                    extent=np.array([e1, e2, e3]))
+    if is_iso and desc.radiality >= t["radial_thr"] and desc.eig_ratio[0] >= t["eig_thr"]:
+        r = float(np.linalg.norm(pts - desc.centroid, axis=1).mean())
+        return done("spherical", desc.centroid, "descriptors", radius=r)
+    if looks_cyl and desc.normal_axis_share <= t["axis_share_thr"]:
+        p, r = fit_circle_on_axis(pts, desc.normal_axis)
+        return done("cylindrical", p, "descriptors", radius=r, axis=desc.normal_axis)
+    clock.lap("descriptors")
+
+    # ---------- 3. Ajustements fermés ----------------------------------------
+    thr_s = 0.015 * ext.mean()           # 1.5 % du diamètre
+    thr_c = 0.03 * radius_est            # 3 % du rayon
+    if is_iso:
+        c, r, rms, inl = fit_sphere_lsq(pts, thr=thr_s)
+        if verbose:
+            print(f"LSQ sphere inliers: {inl:.2%} (rms {rms:.4f})")
+        if inl >= t["lsq_ratio"]:
+            return done("spherical", c, "lsq", radius=r, inlier_ratio=inl)
+    if looks_cyl:
+        p, axis, r, rms, inl = fit_cylinder_lsq(pts, thr=thr_c)
+        if verbose:
+            print(f"LSQ cylinder inliers: {inl:.2%} (rms {rms:.4f})")
+        if inl >= t["lsq_ratio"]:
+            return done("cylindrical", p, "lsq", radius=r, axis=axis, inlier_ratio=inl)
+    clock.lap("lsq")
+
+    # ---------- 4. RANSAC : sphère -------------------------------------------
+    if is_iso:
+        c, r, inl = fit_sphere(pts, thr=thr_s)
         if verbose:
             print(f"Sphere inliers: {inl:.2%}")
-        if inl > 0.70:
-            return "spherical"
+        if inl > t["sphere_ratio"]:
+            return done("spherical", c, "ransac", radius=r, inlier_ratio=inl)
 
-    # ---------- Cylindre ----------------------------------------------------
-    cyl_thr = 0.15                       # rayonX ≈ rayonY ±15 %
-    length_ratio = 1.15                  # hauteur ≥ 1.15 × rayon
-    radius_est = (e1 + e2) / 2
-    looks_cyl = abs(e1 - e2) < cyl_thr * radius_est and e3 > length_ratio * radius_est
+    # ---------- 4. RANSAC : cylindre -----------------------------------------
     if looks_cyl:
+        p = axis = r = None
         # essai Open3D (si ≥0.18)
         try:
             _, inliers = pcd_d.segment_cylinder(distance_threshold=0.02 * radius_est,
@@ -50,18 +156,29 @@ def detect_shape(pcd: o3d.geometry.PointCloud, verbose: bool = False) -> str:
             inlier_ratio = len(inliers) / len(pcd_d.points)
             if verbose:
                 print(f"O3D cylinder inliers: {inlier_ratio:.2%}")
+            if len(inliers) >= 5:                      # paramètres ajustés sur les inliers Open3D
+                p, axis, r, _, _ = fit_cylinder_lsq(pts[np.asarray(inliers)], thr=thr_c)
         except AttributeError:
             inlier_ratio = 0.0
 
         # fallback RANSAC maison si besoin
-        if inlier_ratio < 0.25:
-            thr_c = 0.03 * radius_est    # 3 % du rayon
-            _, _, _, inlier_ratio = fit_cylinder(np.asarray(pcd_d.points), thr=thr_c)
+        if inlier_ratio < t["cylinder_ratio"]:
+            # normales fournies (p. ex. par le pipeline Filtering) → modèle 2 points
+            normals = np.asarray(pcd_d.normals) if pcd_d.has_normals() else None
+            p, axis, r, inlier_ratio = fit_cylinder(pts, thr=thr_c, normals=normals)
             if verbose:
                 print(f"Fallback cylinder inliers: {inlier_ratio:.2%}")
 
-        if inlier_ratio > 0.25:
-            return "cylindrical"
+        if inlier_ratio > t["cylinder_ratio"]:
+            return done("cylindrical", p if p is not None else np.asarray(obb.center), "ransac",
+                        radius=r, axis=axis, inlier_ratio=inlier_ratio)
 
     # ---------- Par défaut ---------------------------------------------------
-    return "cuboid/tablet"
+    return done("cuboid/tablet", np.asarray(obb.center), "ransac", extent=np.array([e1, e2, e3]))
+
+
+def detect_shape(pcd: o3d.geometry.PointCloud,
+                 verbose: bool = False,
+                 thresholds: dict | None = None) -> str:
+    """Retourne 'spherical', 'cylindrical' ou 'cuboid/tablet'."""
+    return analyze_shape(pcd, verbose, thresholds).label
@@ -0,0 +1,93 @@
+"""
+Ajustements fermés (moindres carrés) — voie rapide avant RANSAC :
+  • sphère   → fit_sphere_lsq(...)   (ajustement algébrique)
+  • cylindre → fit_cylinder_lsq(...) (axe ACP + cercle algébrique)
+
+Pour un objet proprement segmenté, un seul solve suffit ; les statistiques
+de résidus disent si le modèle est assez serré pour être accepté tel quel.
+
+Chaque fonction renvoie :
+  sphere   : (centre(3,), rayon, rms, inlier_ratio)
+  cylinder : (axis_point(3,), axis_dir(3,), rayon, rms, inlier_ratio)
+"""
+
+from __future__ import annotations
+import numpy as np
+
+__all__ = ["fit_sphere_lsq", "fit_cylinder_lsq", "fit_circle_on_axis"]
+
+
+def _stats(residuals: np.ndarray, thr: float) -> tuple[float, float]:
+    return float(np.sqrt(np.mean(residuals ** 2))), float(np.mean(residuals < thr))
+
+
+def _circle_lsq(uv: np.ndarray) -> tuple[np.ndarray, float]:
+    """Cercle algébrique (Kåsa) : 2 u·cx + 2 v·cy + d = u² + v²."""
+    A = np.c_[2 * uv, np.ones(len(uv))]
+    sol = np.linalg.lstsq(A, (uv ** 2).sum(axis=1), rcond=None)[0]
+    c = sol[:2]
+    return c, float(np.sqrt(max(sol[2] + c @ c, 0.0)))
+
+
+def _plane_basis(axis: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    u = np.cross(axis, [1.0, 0.0, 0.0] if abs(axis[0]) < 0.9 else [0.0, 1.0, 0.0])
+    u /= np.linalg.norm(u)
+    return u, np.cross(axis, u)
+
+
+# --------------------------------------------------------------------------- #
+def fit_circle_on_axis(points: np.ndarray, axis: np.ndarray) -> tuple[np.ndarray, float]:
+    """Cylindre d'axe *axis* connu : (point de l'axe, rayon) par cercle algébrique."""
+    points = np.asarray(points, dtype=np.float64)
+    mean = points.mean(axis=0)
+    u, v = _plane_basis(np.asarray(axis, dtype=np.float64))
+    x = points - mean
+    c, r = _circle_lsq(np.c_[x @ u, x @ v])
+    return mean + c[0] * u + c[1] * v, r
+
+
+def fit_sphere_lsq(points: np.ndarray,
+                   thr: float = 0.015) -> tuple[np.ndarray | None, float | None, float, float]:
+    """
+    Sphère algébrique : |x|² = 2 x·c + d, linéaire en (c, d), r² = d + |c|².
+      - thr : tolérance (mètres) pour le ratio d'inliers
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) < 4:
+        return None, None, np.inf, 0.0
+    mean = points.mean(axis=0)
+    x = points - mean                                   # conditionnement
+    A = np.c_[2 * x, np.ones(len(x))]
+    sol = np.linalg.lstsq(A, (x ** 2).sum(axis=1), rcond=None)[0]
+    c = sol[:3]
+    r = float(np.sqrt(max(sol[3] + c @ c, 0.0)))
+    res = np.abs(np.linalg.norm(x - c, axis=1) - r)
+    return (c + mean, r, *_stats(res, thr))
+
+
+def fit_cylinder_lsq(points: np.ndarray,
+                     thr: float = 0.02) -> tuple[np.ndarray | None, np.ndarray | None,
+                                                 float | None, float, float]:
+    """
+    Cylindre : chaque axe principal (ACP) est essayé comme axe, les points
+    sont projetés sur le plan orthogonal et un cercle y est ajusté ; l'axe
+    de plus faible rms est retenu (couvre les cylindres plus larges que hauts).
+      - thr : tolérance (mètres) pour le ratio d'inliers
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) < 5:
+        return None, None, None, np.inf, 0.0
+    mean = points.mean(axis=0)
+    x = points - mean
+    _, vecs = np.linalg.eigh(x.T @ x)
+
+    best = None
+    for k in range(3):
+        axis, u, v = vecs[:, k], vecs[:, (k + 1) % 3], vecs[:, (k + 2) % 3]
+        uv = np.c_[x @ u, x @ v]
+        c, r = _circle_lsq(uv)
+        res = np.abs(np.linalg.norm(uv - c, axis=1) - r)
+        rms, ratio = _stats(res, thr)
+        if best is None or rms < best[3]:
+            best = (mean + c[0] * u + c[1] * v, axis, r, rms, ratio)
+    return best
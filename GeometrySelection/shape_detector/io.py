@@ -15,7 +15,18 @@ def load_point_cloud(path: Path) -> o3d.geometry.PointCloud:
     return pcd
 
 
-def capture_realsense_frame() -> o3d.geometry.PointCloud:  # pragma: no cover
+def points_to_tensor(points) -> o3d.t.geometry.PointCloud:
+    """
+    ``rs.points`` -> float32 tensor cloud : vertices viewed in place,
+    invalid (z == 0) pixels dropped by one vectorised mask, handed to
+    Open3D with ``Tensor.from_numpy`` (no float64 copy).
+    """
+    xyz = np.asanyarray(points.get_vertices()).view(np.float32).reshape(-1, 3)
+    return o3d.t.geometry.PointCloud(o3d.core.Tensor.from_numpy(xyz[xyz[:, 2] > 0]))
+
+
+def capture_realsense_frame(tensor: bool = False):  # pragma: no cover
+    """One depth frame as a legacy cloud (or float32 tensor cloud if *tensor*)."""
     try:
         import pyrealsense2 as rs
     except ImportError as exc:
@@ -34,12 +45,31 @@ def capture_realsense_frame() -> o3d.geometry.PointCloud:  # pragma: no cover
         if not depth:
             raise RuntimeError("No depth frame")
         pc = rs.pointcloud()
-        points = pc.calculate(depth)
-        vtx = np.asanyarray(points.get_vertices(), dtype=np.float32)
-        xyz = vtx.view(np.float32).reshape(-1, 3)
+        pcd = points_to_tensor(pc.calculate(depth))
     finally:
         pipeline.stop()
 
-    pcd = o3d.geometry.PointCloud()
-    pcd.points = o3d.utility.Vector3dVector(xyz)
-    return pcd
+    return pcd if tensor else pcd.to_legacy()
+
+
+def stream_realsense_frames(warmup: int = 5):  # pragma: no cover
+    """Générateur de nuages (legacy) depuis un flux RealSense ouvert une seule fois."""
+    try:
+        import pyrealsense2 as rs
+    except ImportError as exc:
+        raise RuntimeError("pyrealsense2 not installed") from exc
+
+    pipeline = rs.pipeline()
+    cfg = rs.config()
+    cfg.enable_stream(rs.stream.depth, 640, 480, rs.format.z16, 30)
+    pipeline.start(cfg)
+    pc = rs.pointcloud()
+    try:
+        for _ in range(warmup):
+            pipeline.wait_for_frames()
+        while True:
+            depth = pipeline.wait_for_frames().get_depth_frame()
+            if depth:
+                yield points_to_tensor(pc.calculate(depth)).to_legacy()
+    finally:
+        pipeline.stop()
@@ -0,0 +1,263 @@
+"""
+Extraction de plusieurs primitives (plans, sphères, cylindres) dans un même
+nuage, façon « Efficient RANSAC » (Schnabel et al.) :
+  • échantillonnage localisé : le 1er point est tiré au hasard, les autres
+    dans la même cellule d'un octree, à un niveau tiré au hasard
+  • modèles minimaux avec normales (plan : 3 points, sphère / cylindre :
+    2 points + normales), rejetés si leurs propres points ne collent pas
+  • score préemptif sur un sous-échantillon, score complet des meilleurs
+  • extraction gloutonne : la primitive la mieux supportée est affinée par
+    moindres carrés, ses inliers retirés, et l'on recommence
+
+Utile pour les objets composites (corps cylindrique + anse, corps + bouchon).
+"""
+
+from __future__ import annotations
+from typing import NamedTuple
+import numpy as np
+import open3d as o3d
+
+from .fit import fit_sphere_lsq, fit_circle_on_axis
+from .ransac import _cylinder_from_normals
+
+__all__ = ["Primitive", "extract_primitives", "KINDS"]
+
+KINDS = ("plane", "sphere", "cylinder")
+
+
+class Primitive(NamedTuple):
+    kind: str                   # 'plane', 'sphere' ou 'cylinder'
+    params: dict                # plane : normal, d · sphere : centre, radius · cylinder : point, axis, radius
+    indices: np.ndarray         # inliers (indices dans le nuage d'entrée)
+
+
+# --------------------------------------------------------------------------- #
+#  O C T R E E                                                                #
+# --------------------------------------------------------------------------- #
+class _Octree:
+    """Clés de cellule par niveau ; les points restants sont triés par clé pour chaque niveau."""
+    def __init__(self, points: np.ndarray, depth: int):
+        lo = points.min(axis=0)
+        span = max(float((points.max(axis=0) - lo).max()), 1e-9)
+        u = (points - lo) / span                                   # [0, 1]
+        self.depth = depth
+        self.keys = []
+        for level in range(1, depth + 1):
+            ijk = np.minimum((u * (1 << level)).astype(np.int64), (1 << level) - 1)
+            self.keys.append((ijk[:, 0] << (2 * level)) | (ijk[:, 1] << level) | ijk[:, 2])
+        self.update(np.arange(len(points)))
+
+    def update(self, remaining: np.ndarray) -> None:
+        self.order, self.sorted = [], []
+        for keys in self.keys:
+            o = remaining[np.argsort(keys[remaining], kind="stable")]
+            self.order.append(o)
+            self.sorted.append(keys[o])
+
+    def sample(self, seeds: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+        """Pour chaque graine, k-1 autres points de sa cellule (niveau aléatoire) → (B', k)."""
+        levels = rng.integers(0, self.depth, len(seeds))
+        out = []
+        for lv in np.unique(levels):
+            s = seeds[levels == lv]
+            key = self.keys[lv][s]
+            lo = np.searchsorted(self.sorted[lv], key, "left")
+            hi = np.searchsorted(self.sorted[lv], key, "right")
+            ok = hi - lo >= k
+            s, lo, hi = s[ok], lo[ok], hi[ok]
+            pick = lo[:, None] + (rng.random((len(s), k - 1)) * (hi - lo)[:, None]).astype(np.int64)
+            out.append(np.c_[s, self.order[lv][pick]])
+        idx = np.concatenate(out) if out else np.zeros((0, k), dtype=np.int64)
+        srt = np.sort(idx, axis=1)
+        return idx[(srt[:, 1:] != srt[:, :-1]).all(axis=1)]
+
+
+# --------------------------------------------------------------------------- #
+#  M O D È L E S                                                              #
+# --------------------------------------------------------------------------- #
+def _planes(p: np.ndarray, n: np.ndarray) -> tuple[dict, np.ndarray]:
+    nrm = np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0])
+    length = np.linalg.norm(nrm, axis=1)
+    ok = length > 1e-12
+    nrm = nrm[ok] / length[ok, None]
+    return {"normal": nrm, "d": -(nrm * p[ok, 0]).sum(axis=1)}, ok
+
+
+def _spheres(p: np.ndarray, n: np.ndarray) -> tuple[dict, np.ndarray]:
+    """Sphère de 2 points + normales : milieu des points les plus proches des deux droites normales."""
+    p1, p2, n1, n2 = p[:, 0], p[:, 1], n[:, 0], n[:, 1]
+    d = p2 - p1
+    c = (n1 * n2).sum(axis=1)
+    ok = np.abs(c) < 0.999
+    p1, p2, n1, n2, d, c = p1[ok], p2[ok], n1[ok], n2[ok], d[ok], c[ok]
+    d1, d2 = (d * n1).sum(axis=1), (d * n2).sum(axis=1)
+    t = (d1 - c * d2) / (1 - c ** 2)
+    s = (c * d1 - d2) / (1 - c ** 2)
+    centre = (p1 + t[:, None] * n1 + p2 + s[:, None] * n2) / 2
+    r = (np.linalg.norm(p1 - centre, axis=1) + np.linalg.norm(p2 - centre, axis=1)) / 2
+    return {"centre": centre, "radius": r}, ok
+
+
+def _cylinders(p: np.ndarray, n: np.ndarray) -> tuple[dict, np.ndarray]:
+    ok = np.linalg.norm(np.cross(n[:, 0], n[:, 1]), axis=1) >= 1e-2   # filtre de _cylinder_from_normals
+    point, axis, r = _cylinder_from_normals(p[:, :2], n[:, :2])
+    return {"point": point, "axis": axis, "radius": r}, ok
+
+
+# type -> (constructeur (modèles, lignes valides), points de l'échantillon utilisés)
+_BUILD = {"plane": (_planes, 3), "sphere": (_spheres, 2), "cylinder": (_cylinders, 2)}
+
+
+def _fit(kind: str, x: np.ndarray, n: np.ndarray, m: dict, thr: float, cos_thr: float) -> np.ndarray:
+    """Inliers (M, B) : distance < *thr* et normale à moins de acos(*cos_thr*) du modèle."""
+    if kind == "plane":
+        dist = x @ m["normal"].T + m["d"]
+        dev = np.abs(n @ m["normal"].T)
+        return (np.abs(dist) < thr) & (dev > cos_thr)
+    if kind == "sphere":
+        v = x[:, None, :] - m["centre"][None]
+        dist = np.linalg.norm(v, axis=2)
+        dev = np.abs((v * n[:, None, :]).sum(axis=2)) / np.maximum(dist, 1e-12)
+        return (np.abs(dist - m["radius"]) < thr) & (dev > cos_thr)
+    w = x[:, None, :] - m["point"][None]
+    radial = w - (w * m["axis"][None]).sum(axis=2, keepdims=True) * m["axis"][None]
+    dist = np.linalg.norm(radial, axis=2)
+    dev = np.abs((radial * n[:, None, :]).sum(axis=2)) / np.maximum(dist, 1e-12)
+    return (np.abs(dist - m["radius"]) < thr) & (dev > cos_thr)
+
+
+def _take(m: dict, sel) -> dict:
+    return {k: v[sel] for k, v in m.items()}
+
+
+def _refine(kind: str, x: np.ndarray, n: np.ndarray) -> dict:
+    """Moindres carrés sur les inliers (un seul modèle, tableaux de taille 1)."""
+    if kind == "plane":
+        c = x.mean(axis=0)
+        normal = np.linalg.svd(x - c, full_matrices=False)[2][-1]
+        return {"normal": normal[None], "d": np.array([-normal @ c])}
+    if kind == "sphere":
+        centre, r, _, _ = fit_sphere_lsq(x)
+        return {"centre": centre[None], "radius": np.array([r])}
+    axis = np.linalg.eigh(n.T @ n)[1][:, 0]       # normales ⟂ axe
+    point, r = fit_circle_on_axis(x, axis)
+    return {"point": point[None], "axis": axis[None], "radius": np.array([r])}
+
+
+def _coaxial(found: list[Primitive], kind: str, m: dict, tol: float) -> int | None:
+    """Indice d'un cylindre déjà trouvé de même axe (à *tol* radian près) et de même rayon / position (à *tol* · rayon)."""
+    axis, point, r = m["axis"][0], m["point"][0], float(m["radius"][0])
+    for j, prim in enumerate(found):
+        if prim.kind != kind:
+            continue
+        a, p, rj = prim.params["axis"], prim.params["point"], prim.params["radius"]
+        off = point - p
+        off = np.linalg.norm(off - (off @ a) * a)                  # distance de l'axe au précédent
+        if abs(axis @ a) >= np.cos(tol) and max(abs(r - rj), off) <= tol * max(r, rj):
+            return j
+    return None
+
+
+# --------------------------------------------------------------------------- #
+def extract_primitives(pcd: o3d.geometry.PointCloud,
+                       kinds: tuple[str, ...] = KINDS,
+                       thr: float | None = None,
+                       max_angle: float = 20.0,
+                       min_support: float = 0.05,
+                       max_primitives: int = 6,
+                       batch: int = 256,
+                       pretest: int = 512,
+                       keep: int = 4,
+                       patience: int = 3,
+                       depth: int = 6,
+                       merge_tol: float = 0.1,
+                       seed: int | None = None) -> list[Primitive]:
+    """
+    Primitives extraites une à une, de la mieux supportée à la moins bien.
+      - thr         : tolérance de distance (défaut : 1 % de la plus grande dimension)
+      - max_angle   : écart max (degrés) entre normale du point et du modèle
+      - min_support : part minimale du nuage pour accepter une primitive
+      - batch       : hypothèses par type et par tour ; *pretest* / *keep* :
+                      score préemptif comme :func:`ransac.fit_cylinder`
+      - patience    : tours sans primitive acceptable avant d'arrêter
+      - depth       : profondeur de l'octree d'échantillonnage
+      - merge_tol   : un cylindre coaxial à un cylindre déjà trouvé (axes à
+                      *merge_tol* radian près, rayons et axes à *merge_tol* · rayon
+                      près) lui est fusionné au lieu d'être ajouté
+    Les normales du nuage sont utilisées si présentes, sinon estimées.
+    """
+    unknown = set(kinds) - set(KINDS)
+    if unknown:
+        raise ValueError(f"Unknown primitive kind(s) {sorted(unknown)}; expected a subset of {KINDS}")
+    pts = np.asarray(pcd.points, dtype=np.float64)
+    if len(pts) < 10:
+        return []
+    if pcd.has_normals():
+        nrm = np.asarray(pcd.normals, dtype=np.float64)
+    else:
+        tmp = o3d.geometry.PointCloud(pcd.points)
+        tmp.estimate_normals(o3d.geometry.KDTreeSearchParamKNN(16))
+        nrm = np.asarray(tmp.normals)
+    nrm = nrm / np.maximum(np.linalg.norm(nrm, axis=1, keepdims=True), 1e-12)
+    if thr is None:
+        thr = 0.01 * float((pts.max(axis=0) - pts.min(axis=0)).max())
+    cos_thr = np.cos(np.radians(max_angle))
+    min_count = max(int(min_support * len(pts)), 10)
+
+    rng = np.random.default_rng(seed)
+    tree = _Octree(pts, depth)
+    remaining = np.arange(len(pts))
+    found: list[Primitive] = []
+    misses = 0
+    while len(found) < max_primitives and len(remaining) >= min_count and misses < patience:
+        seeds = remaining[rng.integers(0, len(remaining), batch)]
+        samples = tree.sample(seeds, 3, rng)
+        sub = remaining[rng.integers(0, len(remaining), min(pretest, len(remaining)))]
+        x_r, n_r = pts[remaining], nrm[remaining]
+
+        best = None                                              # (count, kind, model)
+        for kind in kinds:
+            build, k = _BUILD[kind]
+            m, valid = build(pts[samples], nrm[samples])
+            own = samples[valid, :k]
+            if len(own) == 0:
+                continue
+            # rejet des modèles qui n'expliquent pas leurs propres points
+            ok = np.ones(len(own), dtype=bool)
+            for j in range(k):
+                ok &= _fit(kind, pts[own[:, j]], nrm[own[:, j]], m, thr, cos_thr).diagonal()
+            if not ok.any():
+                continue
+            m = _take(m, ok)
+            pre = _fit(kind, pts[sub], nrm[sub], m, thr, cos_thr).sum(axis=0)
+            m = _take(m, np.argsort(-pre, kind="stable")[:keep])
+            counts = _fit(kind, x_r, n_r, m, thr, cos_thr).sum(axis=0)
+            i = int(counts.argmax())
+            if best is None or counts[i] > best[0]:
+                best = (int(counts[i]), kind, _take(m, slice(i, i + 1)))
+
+        if best is None or best[0] < min_count:
+            misses += 1
+            continue
+        misses = 0
+        count, kind, m = best
+        mask = _fit(kind, x_r, n_r, m, thr, cos_thr)[:, 0]
+        refined = _refine(kind, x_r[mask], n_r[mask])
+        mask_ref = _fit(kind, x_r, n_r, refined, thr, cos_thr)[:, 0]
+        if mask_ref.sum() >= mask.sum():
+            m, mask = refined, mask_ref
+        j = _coaxial(found, kind, m, merge_tol) if kind == "cylinder" else None
+        if j is not None:
+            # même surface coupée en morceaux par des normales bruitées : on fusionne et on réajuste
+            idx = np.r_[found[j].indices, remaining[mask]]
+            m = _refine(kind, pts[idx], nrm[idx])
+            mask |= _fit(kind, x_r, n_r, m, thr, cos_thr)[:, 0]
+            idx = np.r_[found[j].indices, remaining[mask]]
+        params = {k: (v[0] if v.ndim > 1 else float(v[0])) for k, v in m.items()}
+        if j is not None:
+            found[j] = Primitive(kind, params, idx)
+        else:
+            found.append(Primitive(kind, params, remaining[mask]))
+        remaining = remaining[~mask]
+        tree.update(remaining)
+    return found
@@ -9,92 +9,261 @@ Chaque fonction renvoie :
 """
 
 from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
 import numpy as np
 
-__all__ = ["fit_sphere", "fit_cylinder"]
+__all__ = ["fit_sphere", "fit_cylinder", "DEFAULT_WORKERS"]
+
+# threads par appel quand *workers* n'est pas donné ; le parallélisme est à
+# demander explicitement (les appelants en pool de processus en ont déjà un)
+DEFAULT_WORKERS = 1
+
+
+# --------------------------------------------------------------------------- #
+#  O U T I L S                                                                #
+# --------------------------------------------------------------------------- #
+def _sample(n: int, k: int, count: int, rng: np.random.Generator) -> np.ndarray:
+    """*count* tirages de *k* indices distincts parmi *n* (tableau (m, k), m ≤ count)."""
+    idx = rng.integers(0, n, size=(count, k))
+    s = np.sort(idx, axis=1)
+    return idx[(s[:, 1:] != s[:, :-1]).all(axis=1)]
+
+
+def _needed_iterations(ratio: float, k: int, probability: float) -> float:
+    """Nombre de tirages pour trouver, avec *probability*, un échantillon de *k* inliers."""
+    if ratio <= 0.0:
+        return np.inf
+    w = ratio ** k
+    if w >= 1.0:
+        return 0.0
+    return np.log(1.0 - probability) / np.log(1.0 - w)
+
+
+def _run_chunks(evaluate: Callable[[int, np.random.Generator], tuple[int, tuple | None]],
+                it: int, batch: int, n: int, k: int, probability: float | None,
+                seed: int | None, workers: int | None) -> tuple[int, tuple | None]:
+    """
+    Boucle RANSAC commune : le budget *it* est découpé en lots de *batch*
+    hypothèses, le lot j tirant avec son propre enfant ``SeedSequence(seed)``.
+    Avec *workers* > 1, au plus *workers* lots sont en vol sur des threads
+    (NumPy relâche le GIL dans les gros calculs) ; les résultats sont fusionnés
+    dans l'ordre des lots et un nouveau lot n'est lancé que si le préfixe
+    fusionné n'a pas atteint l'arrêt anticipé : une graine donne le même
+    résultat quel que soit le nombre de threads, et au plus *workers* - 1 lots
+    sont calculés pour rien. *probability* = None désactive l'arrêt anticipé.
+    """
+    sizes = [min(batch, it - s) for s in range(0, it, batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    workers = max(1, min(workers or DEFAULT_WORKERS, len(sizes)))
+    run = lambda j: evaluate(sizes[j], np.random.default_rng(seeds[j]))
+
+    def finished() -> bool:
+        return probability is not None and done >= _needed_iterations(best_count / n, k, probability)
+
+    best_count, best, done = 0, None, 0
+    if workers == 1:
+        for j in range(len(sizes)):
+            if finished():
+                break
+            count, model = run(j)
+            done += sizes[j]
+            if count > best_count:
+                best_count, best = count, model
+        return best_count, best
+
+    pool = ThreadPoolExecutor(workers)
+    try:
+        pending = {j: pool.submit(run, j) for j in range(workers)}
+        for j in range(len(sizes)):
+            count, model = pending.pop(j).result()
+            done += sizes[j]
+            if count > best_count:
+                best_count, best = count, model
+            if finished():
+                break
+            if j + workers < len(sizes):
+                pending[j + workers] = pool.submit(run, j + workers)
+    finally:
+        pool.shutdown(cancel_futures=True)
+    return best_count, best
 
 
 # --------------------------------------------------------------------------- #
 #  S P H E R E                                                                #
 # --------------------------------------------------------------------------- #
+def _sphere_candidates(samples: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Centres / rayons des sphères passant par chaque quadruplet (B, 4, 3), en un seul solve."""
+    p1 = samples[:, 0]
+    A = 2 * (samples[:, 1:] - p1[:, None])                              # (B, 3, 3)
+    b = (samples[:, 1:] ** 2).sum(axis=2) - (p1 ** 2).sum(axis=1)[:, None]
+    ok = np.abs(np.linalg.det(A)) > 1e-12                               # points coplanaires exclus
+    c = np.linalg.solve(A[ok], b[ok][..., None])[..., 0]
+    return c, np.linalg.norm(p1[ok] - c, axis=1)
+
+
+def _sphere_counts(points: np.ndarray, sq: np.ndarray, c: np.ndarray, r: np.ndarray,
+                   thr: float, block_elems: int) -> np.ndarray:
+    """Nombre d'inliers de chaque sphère, par blocs de ≤ *block_elems* distances."""
+    counts = np.empty(len(c), dtype=np.int64)
+    step = max(1, block_elems // max(len(points), 1))
+    for s in range(0, len(c), step):
+        cb, rb = c[s:s + step], r[s:s + step]
+        # |x - c|² = |x|² - 2 x·c + |c|², en un produit matriciel (N, B)
+        d2 = sq[:, None] - 2.0 * (points @ cb.T) + (cb ** 2).sum(axis=1)
+        d = np.sqrt(np.maximum(d2, 0.0))
+        counts[s:s + step] = (np.abs(d - rb) < thr).sum(axis=0)
+    return counts
+
+
 def fit_sphere(points: np.ndarray,
                it: int = 1000,
-               thr: float = 0.015) -> tuple[np.ndarray | None,
-                                             float | None,
-                                             float]:
+               thr: float = 0.015,
+               probability: float = 0.999,
+               seed: int | None = None,
+               batch: int = 128,
+               block_elems: int = 1 << 22,
+               workers: int | None = None) -> tuple[np.ndarray | None,
+                                                    float | None,
+                                                    float]:
     """
-    RANSAC sphère :
-      - it  : nombre d'itérations
-      - thr : tolérance (mètres) pour qu’un point soit inlier
+    RANSAC sphère (vectorisé) :
+      - it          : nombre maximal d'hypothèses
+      - thr         : tolérance (mètres) pour qu’un point soit inlier
+      - probability : arrêt anticipé dès que cette confiance est atteinte
+                      pour le meilleur ratio d'inliers
+      - seed        : résultat reproductible, indépendant de *workers*
+      - workers     : threads (défaut : :data:`DEFAULT_WORKERS`), voir :func:`_run_chunks`
+    Les hypothèses sont tirées par lots de *batch*, leurs centres résolus
+    en un seul ``np.linalg.solve`` empilé et évaluées par blocs mémoire bornés.
     """
+    points = np.asarray(points, dtype=np.float64)
     n = points.shape[0]
     if n < 4:
         return None, None, 0.0
 
-    best_ratio = 0.0
-    best = None
-    rng = np.random.default_rng()
+    sq = (points ** 2).sum(axis=1)
 
-    for _ in range(it):
-        p1, p2, p3, p4 = points[rng.choice(n, 4, replace=False)]
+    def evaluate(m: int, rng: np.random.Generator):
+        c, r = _sphere_candidates(points[_sample(n, 4, m, rng)])
+        if len(c) == 0:
+            return 0, None
+        counts = _sphere_counts(points, sq, c, r, thr, block_elems)
+        i = int(counts.argmax())
+        return int(counts[i]), (c[i], float(r[i]))
 
-        # Résolution linéaire du centre
-        A = np.vstack([2 * (p2 - p1),
-                       2 * (p3 - p1),
-                       2 * (p4 - p1)])
-        b = np.array([np.dot(p2, p2) - np.dot(p1, p1),
-                      np.dot(p3, p3) - np.dot(p1, p1),
-                      np.dot(p4, p4) - np.dot(p1, p1)])
-        try:
-            c = np.linalg.solve(A, b)                   # centre
-        except np.linalg.LinAlgError:
-            continue
-
-        r = np.linalg.norm(p1 - c)
-        d = np.abs(np.linalg.norm(points - c, axis=1) - r)
-        inliers = d < thr
-        ratio = inliers.sum() / n
-        if ratio > best_ratio:
-            best_ratio, best = ratio, (c, r)
-
-    return (*best, best_ratio) if best else (None, None, 0.0)
+    best_count, best = _run_chunks(evaluate, it, batch, n, 4, probability, seed, workers)
+    return (*best, best_count / n) if best else (None, None, 0.0)
 
 
 # --------------------------------------------------------------------------- #
 #  C Y L I N D E R                                                            #
 # --------------------------------------------------------------------------- #
+def _cylinder_from_points(samples: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Modèle 3 points : axe p1→p2, rayon = distance de p3 à l'axe."""
+    p1, p2, p3 = samples[:, 0], samples[:, 1], samples[:, 2]
+    axis = p2 - p1
+    norm = np.linalg.norm(axis, axis=1)
+    ok = norm >= 1e-3
+    axis = axis[ok] / norm[ok, None]
+    r = np.linalg.norm(np.cross(p3[ok] - p1[ok], axis), axis=1)
+    return p1[ok], axis, r
+
+
+def _cylinder_from_normals(samples: np.ndarray,
+                           normals: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Modèle 2 points + normales : axe = n1 × n2, centre = intersection des
+    droites p + t·n dans le plan orthogonal à l'axe, rayon = |t| moyen.
+    """
+    p1, p2 = samples[:, 0], samples[:, 1]
+    n1, n2 = normals[:, 0], normals[:, 1]
+    axis = np.cross(n1, n2)
+    norm = np.linalg.norm(axis, axis=1)
+    ok = norm >= 1e-2                                   # normales (quasi) parallèles exclues
+    p1, p2, n1, n2 = p1[ok], p2[ok], n1[ok], n2[ok]
+    axis = axis[ok] / norm[ok, None]
+    d = p2 - p1
+    c = (n1 * n2).sum(axis=1)
+    d1, d2 = (n1 * d).sum(axis=1), (n2 * d).sum(axis=1)
+    s = (d2 - c * d1) / (c ** 2 - 1.0)
+    t = d1 + c * s
+    return p1 + t[:, None] * n1, axis, (np.abs(t) + np.abs(s)) / 2
+
+
+def _cylinder_counts(points: np.ndarray, sq: np.ndarray,
+                     p: np.ndarray, a: np.ndarray, r: np.ndarray,
+                     thr: float, block_elems: int) -> np.ndarray:
+    """Nombre d'inliers de chaque cylindre, par blocs de ≤ *block_elems* distances."""
+    counts = np.empty(len(p), dtype=np.int64)
+    step = max(1, block_elems // max(len(points), 1))
+    for s in range(0, len(p), step):
+        pb, ab, rb = p[s:s + step], a[s:s + step], r[s:s + step]
+        # distance² à l'axe = |x - p|² - ((x - p)·a)², en deux produits matriciels (N, B)
+        along = points @ ab.T - (pb * ab).sum(axis=1)
+        d2 = sq[:, None] - 2.0 * (points @ pb.T) + (pb ** 2).sum(axis=1) - along ** 2
+        d = np.sqrt(np.maximum(d2, 0.0))
+        counts[s:s + step] = (np.abs(d - rb) < thr).sum(axis=0)
+    return counts
+
+
 def fit_cylinder(points: np.ndarray,
                  it: int = 1000,
-                 thr: float = 0.02) -> tuple[np.ndarray | None,
-                                               np.ndarray | None,
-                                               float | None,
-                                               float]:
+                 thr: float = 0.02,
+                 normals: np.ndarray | None = None,
+                 probability: float = 0.999,
+                 seed: int | None = None,
+                 batch: int = 128,
+                 pretest: int = 64,
+                 keep: int = 4,
+                 block_elems: int = 1 << 22,
+                 workers: int | None = None) -> tuple[np.ndarray | None,
+                                                       np.ndarray | None,
+                                                       float | None,
+                                                       float]:
     """
-    RANSAC cylindre :
-      - thr : distance max entre point et surface latérale
+    RANSAC cylindre (vectorisé, évaluation préemptive) :
+      - thr     : distance max entre point et surface latérale
+      - normals : normales (N, 3) optionnelles (p. ex. issues du pipeline
+                  Filtering) → modèle 2 points, bien plus souvent correct
+                  que le modèle 3 points, et arrêt anticipé à *probability*
+      - pretest : chaque lot de *batch* hypothèses est d'abord évalué sur
+                  ce nombre de points tirés au hasard ; seules les *keep*
+                  meilleures sont évaluées sur tout le nuage
+      - seed, workers : comme :func:`fit_sphere`
     """
+    points = np.asarray(points, dtype=np.float64)
     n = points.shape[0]
     if n < 5:
         return None, None, None, 0.0
+    if normals is not None:
+        normals = np.asarray(normals, dtype=np.float64)
+        normals = normals / np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-12)
+    k = 2 if normals is not None else 3
 
-    best_ratio = 0.0
-    best = None
-    rng = np.random.default_rng()
+    sq = (points ** 2).sum(axis=1)
 
-    for _ in range(it):
-        p1, p2, p3 = points[rng.choice(n, 3, replace=False)]
+    def evaluate(m: int, rng: np.random.Generator):
+        idx = _sample(n, k, m, rng)
+        if normals is not None:
+            p, a, r = _cylinder_from_normals(points[idx], normals[idx])
+        else:
+            p, a, r = _cylinder_from_points(points[idx])
+        if len(p) == 0:
+            return 0, None
 
-        axis_dir = p2 - p1
-        norm = np.linalg.norm(axis_dir)
-        if norm < 1e-3:
-            continue
-        axis_dir /= norm
+        if pretest < n and len(p) > keep:
+            sub = rng.integers(0, n, pretest)
+            pre = _cylinder_counts(points[sub], sq[sub], p, a, r, thr, block_elems)
+            top = np.argpartition(-pre, keep - 1)[:keep]
+            p, a, r = p[top], a[top], r[top]
 
-        r = np.linalg.norm(np.cross(p3 - p1, axis_dir))
-        d = np.linalg.norm(np.cross(points - p1, axis_dir), axis=1) - r
-        inliers = np.abs(d) < thr
-        ratio = inliers.sum() / n
-        if ratio > best_ratio:
-            best_ratio, best = ratio, (p1, axis_dir, r)
+        counts = _cylinder_counts(points, sq, p, a, r, thr, block_elems)
+        i = int(counts.argmax())
+        return int(counts[i]), (p[i], a[i], float(r[i]))
 
-    return (*best, best_ratio) if best else (None, None, None, 0.0)
+    # l'arrêt anticipé suppose qu'un échantillon d'inliers donne le bon
+    # modèle : vrai avec les normales, pas pour le modèle 3 points
+    best_count, best = _run_chunks(evaluate, it, batch, n, k,
+                                   probability if normals is not None else None, seed, workers)
+    return (*best, best_count / n) if best else (None, None, None, 0.0)
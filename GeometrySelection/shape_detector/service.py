@@ -0,0 +1,222 @@
+"""
+Service de détection « chaud » sur socket Unix locale.
+
+Le serveur charge Open3D et la cascade une seule fois (plus un passage de
+chauffe), puis classe les nuages envoyés par les clients du même poste :
+  • requête : en-tête fixe + coordonnées brutes (float32 / float64, C-contigu),
+    et éventuellement les normales ; aucune sérialisation des points, le
+    serveur les lit avec ``recv_into`` directement dans un tampon numpy réutilisé
+  • réponse : JSON court (étiquette, étage, paramètres ajustés, durées)
+
+Le client n'importe ni Open3D ni ``detect`` : un contrôleur qui appelle la
+détection en boucle ne paie que l'envoi des points et la classification.
+
+    python main.py --serve                       # serveur
+    with ShapeClient() as c:                     # client
+        res = c.analyze(points)                  # dict : label, centre, radius …
+"""
+
+from __future__ import annotations
+import json
+import os
+import socket
+import socketserver
+import struct
+import time
+
+import numpy as np
+
+__all__ = ["DEFAULT_SOCKET", "ShapeClient", "serve"]
+
+DEFAULT_SOCKET = "/tmp/shape_detector.sock"
+
+_MAGIC = b"SHPD"
+# magic, dtype (0 float32 / 1 float64), drapeaux, longueur JSON des seuils, nombre de points
+_REQUEST = struct.Struct("<4sBBHI")
+_REPLY = struct.Struct("<4sI")                   # magic, longueur du JSON
+_DTYPES = (np.dtype("<f4"), np.dtype("<f8"))
+_HAS_NORMALS = 1
+
+
+def _recv_into(sock: socket.socket, view: memoryview) -> bool:
+    """Remplit *view* ; False si la connexion se ferme avant le premier octet."""
+    first = True
+    while view.nbytes:
+        n = sock.recv_into(view)
+        if n == 0:
+            if first:
+                return False
+            raise ConnectionError("Connection closed in the middle of a message")
+        view, first = view[n:], False
+    return True
+
+
+def _jsonable(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    return value
+
+
+# --------------------------------------------------------------------------- #
+#  S E R V E U R                                                              #
+# --------------------------------------------------------------------------- #
+class _Handler(socketserver.BaseRequestHandler):
+    """Une connexion = une suite de requêtes ; le tampon grossit au besoin et est réutilisé."""
+    def setup(self):
+        self.buf = bytearray()
+
+    def handle(self):
+        from .detect import analyze_shape
+        sock = self.request
+        head = bytearray(_REQUEST.size)
+        while _recv_into(sock, memoryview(head)):
+            try:
+                reply = self._one(sock, head, analyze_shape)
+            except ConnectionError:
+                return
+            except Exception as err:                   # entrée dégénérée (qhull, Open3D …) : on répond
+                reply = {"error": f"{type(err).__name__}: {err}"}
+            body = json.dumps(reply).encode()
+            sock.sendall(_REPLY.pack(_MAGIC, len(body)) + body)
+
+    def _one(self, sock, head, analyze_shape) -> dict:
+        import open3d as o3d
+        magic, code, flags, meta_len, n = _REQUEST.unpack(head)
+        if magic != _MAGIC or code >= len(_DTYPES):
+            raise ConnectionError("Bad request header")     # flux désynchronisé : on coupe
+        dtype = _DTYPES[code]
+        arrays = 2 if flags & _HAS_NORMALS else 1
+        size = meta_len + arrays * 3 * n * dtype.itemsize
+        if len(self.buf) < size:
+            self.buf = bytearray(size)
+        view = memoryview(self.buf)[:size]
+        if not _recv_into(sock, view):
+            raise ConnectionError("Connection closed in the middle of a message")
+        thresholds = json.loads(bytes(view[:meta_len])) if meta_len else None
+        data = np.frombuffer(self.buf, dtype=dtype, count=arrays * 3 * n, offset=meta_len)
+        data = data.reshape(arrays, n, 3)
+        if n == 0:
+            raise ValueError("Empty point cloud")
+
+        t0 = time.perf_counter()
+        pcd = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(data[0].astype(np.float64, copy=False)))
+        if arrays == 2:
+            pcd.normals = o3d.utility.Vector3dVector(data[1].astype(np.float64, copy=False))
+        res = analyze_shape(pcd, thresholds=thresholds)
+        out = _jsonable(res._asdict())
+        out["service_ms"] = 1e3 * (time.perf_counter() - t0)
+        return out
+
+
+def _warm_up() -> None:
+    """Une classification sur une petite sphère : imports, BLAS et caches Open3D chauds."""
+    import open3d as o3d
+    from .detect import analyze_shape
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(2000, 3))
+    x = 0.05 * x / np.linalg.norm(x, axis=1, keepdims=True)
+    analyze_shape(o3d.geometry.PointCloud(o3d.utility.Vector3dVector(x)))
+
+
+def serve(path: str = DEFAULT_SOCKET, warm_up: bool = True) -> None:
+    """Sert jusqu'à Ctrl-C ; une socket orpheline est remplacée, un serveur vivant est une erreur."""
+    if os.path.exists(path):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+                s.connect(path)
+        except OSError:
+            os.unlink(path)                               # socket orpheline
+        else:
+            raise OSError(f"A shape detection service is already listening on {path}")
+    if warm_up:
+        t0 = time.perf_counter()
+        _warm_up()
+        print(f"Warm-up done in {time.perf_counter() - t0:.2f} s")
+    with socketserver.ThreadingUnixStreamServer(path, _Handler) as server:
+        server.daemon_threads = True
+        print(f"Serving shape detection on {path} (Ctrl-C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print()
+        finally:
+            os.unlink(path)
+
+
+# --------------------------------------------------------------------------- #
+#  C L I E N T                                                                #
+# --------------------------------------------------------------------------- #
+class ShapeClient:
+    """
+    Connexion persistante au service. *points* (et *normals*) : tableau (N, 3)
+    float32 ou float64 — envoyé tel quel s'il est déjà C-contigu — ou tout objet
+    ayant un attribut ``points`` (nuage Open3D).
+    """
+    def __init__(self, path: str = DEFAULT_SOCKET, timeout: float | None = None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+
+    def close(self) -> None:
+        self.sock.close()
+
+    def __enter__(self) -> ShapeClient:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @staticmethod
+    def _array(a) -> np.ndarray:
+        a = np.asarray(a)
+        if a.dtype not in _DTYPES:
+            a = a.astype(np.float64)
+        a = np.ascontiguousarray(a)
+        if a.ndim != 2 or a.shape[1] != 3:
+            raise ValueError(f"Expected an (N, 3) array, got shape {a.shape}")
+        return a
+
+    def analyze(self, points, normals=None, thresholds: dict | None = None) -> dict:
+        """Résultat de :func:`detect.analyze_shape` sous forme de dict (tableaux → listes)."""
+        if normals is None and hasattr(points, "has_normals") and points.has_normals():
+            normals = points.normals
+        pts = self._array(points.points if hasattr(points, "points") else points)
+        if len(pts) == 0:
+            raise ValueError("Empty point cloud")
+        meta = json.dumps(thresholds).encode() if thresholds else b""
+        flags = 0
+        if normals is not None:
+            nrm = self._array(normals).astype(pts.dtype, copy=False)
+            if len(nrm) != len(pts):
+                raise ValueError(f"{len(nrm)} normals for {len(pts)} points")
+            flags |= _HAS_NORMALS
+        code = _DTYPES.index(pts.dtype)
+        try:
+            self.sock.sendall(_REQUEST.pack(_MAGIC, code, flags, len(meta), len(pts)) + meta)
+            self.sock.sendall(memoryview(pts.reshape(-1)).cast("B"))
+            if flags & _HAS_NORMALS:
+                self.sock.sendall(memoryview(nrm.reshape(-1)).cast("B"))
+        except BaseException:
+            self.close()                                  # message partiel : flux inutilisable
+            raise
+
+        head = bytearray(_REPLY.size)
+        if not _recv_into(self.sock, memoryview(head)):
+            raise ConnectionError("Shape detection service closed the connection")
+        magic, length = _REPLY.unpack(head)
+        if magic != _MAGIC:
+            raise ConnectionError("Bad reply header")
+        body = bytearray(length)
+        _recv_into(self.sock, memoryview(body))
+        reply = json.loads(body)
+        if "error" in reply:
+            raise ValueError(reply["error"])
+        return reply
+
+    def detect(self, points, normals=None, thresholds: dict | None = None) -> str:
+        """Retourne 'spherical', 'cylindrical' ou 'cuboid/tablet'."""
+        return self.analyze(points, normals, thresholds)["label"]